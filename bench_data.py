@@ -0,0 +1,408 @@
+"""
+This file contains a benchmark of the data processing pipeline in
+process_data.py, run on made-up datasets much larger than the real one.
+
+Each run generates a synthetic csv in the NCEI layout with the requested
+number of rows, then times each stage of the pipeline the notebook runs
+(read_csv_to_var, parse_all_years, fill_all_regions, organize_regions) and
+measures how much memory each stage needs at its peak. One JSON line per
+stage is appended to an output file, tagged with the current git commit, so
+results from different commits can be compared with --compare.
+
+Run it from the command line, for example:
+    python bench_data.py --rows 1000 100000
+    python bench_data.py --rows 1000 --compare old_results.jsonl
+
+This file uses ten imports to help benchmark the code: argparse, json,
+platform, subprocess, sys, tempfile, time, tracemalloc, numpy, and pandas.
+argparse is used to read the command line options.
+numpy and pandas are used to generate the synthetic events quickly.
+time and tracemalloc are used to measure time and peak memory.
+json, platform, and subprocess are used to record results along with the
+versions and git commit they came from.
+subprocess and sys are also used to time how long the pipeline modules take
+to import in a fresh interpreter.
+tempfile is used to hold the synthetic csv while it is benchmarked.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+import process_data as p
+
+# the sizes benchmarked when none are given on the command line
+DEFAULT_ROWS = [1_000, 100_000, 10_000_000]
+# the modules whose import time is measured unless others are given
+DEFAULT_IMPORTS = ["fetch_data", "process_data", "graph_data"]
+# the file results are appended to when none is given
+DEFAULT_OUTPUT = "bench_results.jsonl"
+# the disaster types used in the NCEI dataset
+DISASTER_TYPES = [
+    "Drought",
+    "Flooding",
+    "Freeze",
+    "Severe Storm",
+    "Tropical Cyclone",
+    "Wildfire",
+    "Winter Storm",
+]
+MONTHS = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+
+def generate_events(num_rows, seed=0):
+    """
+    Makes up a dataframe of disasters in the same layout as the NCEI csv.
+    Names are built from the geo locator's region keywords, so most events
+    land in one region; about one in ten gets keywords from two regions and
+    one in ten gets none, like the ambiguous names in the real data. Dates
+    run from 1980 to 2100.
+
+    Args:
+        num_rows: an int representing the number of events to make up.
+        seed: an int used to seed the random numbers, so that runs are
+        repeatable.
+
+    Returns: A pandas dataframe with the columns of the csv.
+    """
+    rng = np.random.default_rng(seed)
+    keywords = np.array(
+        [key.strip() for keys in p.REGION_KEYWORDS.values() for key in keys]
+    )
+    disasters = np.array(DISASTER_TYPES)[
+        rng.integers(len(DISASTER_TYPES), size=num_rows)
+    ]
+    years = rng.integers(1980, 2101, size=num_rows)
+    months = rng.integers(1, 13, size=num_rows)
+    days = rng.integers(1, 29, size=num_rows)
+
+    first_key = pd.Series(keywords[rng.integers(len(keywords), size=num_rows)])
+    second_key = pd.Series(keywords[rng.integers(len(keywords), size=num_rows)])
+    kind = rng.random(num_rows)
+    prefix = first_key.where(kind >= 0.1, "Eastern")
+    prefix = prefix.where(kind < 0.9, first_key + "/" + second_key)
+    names = (
+        prefix
+        + " "
+        + pd.Series(disasters)
+        + " ("
+        + pd.Series(np.array(MONTHS)[months - 1])
+        + " "
+        + pd.Series(years).astype(str)
+        + ")"
+    )
+    begin = years * 10000 + months * 100 + days
+    return pd.DataFrame(
+        {
+            "Name": names,
+            "Disaster": disasters,
+            "Begin Date": begin,
+            "End Date": begin + rng.integers(0, 3, size=num_rows),
+            "Total CPI-Adjusted Cost (Millions of Dollars)": np.round(
+                rng.lognormal(8, 1.2, size=num_rows), 1
+            ),
+            "Deaths": rng.poisson(20, size=num_rows),
+        }
+    )
+
+
+def write_events_csv(dataframe, file_name):
+    """
+    Writes a dataframe of disasters to a csv in the NCEI layout, with a title
+    line above the header.
+
+    Args:
+        dataframe: a dataframe with the columns of the csv.
+        file_name: a string representing the path to write to.
+    """
+    with open(file_name, "w", encoding="utf-8") as file:
+        file.write("Synthetic Billion-Dollar Disasters\n")
+        dataframe.to_csv(file, index=False)
+
+
+def pipeline_stages(file_name):
+    """
+    Lists the stages of the pipeline the notebook runs. Each stage is a
+    function that takes the result of the stage before it.
+
+    Args:
+        file_name: a string representing the path of the csv to load.
+
+    Returns: A list of (stage name, function) pairs.
+    """
+
+    def parse(dataframe):
+        p.parse_all_years(dataframe)
+        return dataframe
+
+    def organize(inputs):
+        region_dict, yrs, drs = inputs
+        return p.organize_regions(region_dict, yrs, drs, 5)
+
+    return [
+        ("read_csv_to_var", lambda _: p.read_csv_to_var(file_name)),
+        ("parse_all_years", parse),
+        (
+            "fill_all_regions",
+            lambda dataframe: (
+                p.fill_all_regions(dataframe, REGION_LIST),
+                p.retrieve_unique_years(dataframe),
+                p.retrieve_unique_disaster_types(dataframe),
+            ),
+        ),
+        ("organize_regions", organize),
+    ]
+
+
+def measure(stage, stage_input, trace_memory):
+    """
+    Runs one stage once and measures it.
+
+    Args:
+        stage: the function of the stage.
+        stage_input: what to hand the stage. Stages that change their input
+        (like parse_all_years) get a copy, so the stage can be run again.
+        trace_memory: a boolean; if True, peak memory is measured as well.
+        This slows the stage down, so its time should not be trusted.
+
+    Returns: The result of the stage, the seconds it took, and the peak
+    number of bytes it allocated (or None if memory was not traced).
+    """
+    if isinstance(stage_input, pd.DataFrame):
+        stage_input = stage_input.copy()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = stage(stage_input)
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def current_commit():
+    """
+    Finds the git commit the code is running from.
+
+    Returns: A string with the commit hash, or None if it cannot be found.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(num_rows, repeat=1, seed=0):
+    """
+    Benchmarks every stage of the pipeline on a synthetic dataset.
+
+    Args:
+        num_rows: an int representing the number of events to make up.
+        repeat: an int representing how many times to time each stage; the
+        fastest time is kept. Peak memory is measured in one extra run.
+        seed: an int used to seed the random numbers.
+
+    Returns: A list of dictionaries, one per stage, with the stage name, the
+    number of rows, the wall time in seconds, the peak memory in bytes, and
+    the number of rows processed per second.
+    """
+    results = []
+    commit = current_commit()
+    with tempfile.TemporaryDirectory() as folder:
+        file_name = f"{folder}/events.csv"
+        write_events_csv(generate_events(num_rows, seed), file_name)
+        stage_input = None
+        for name, stage in pipeline_stages(file_name):
+            seconds = []
+            for _ in range(repeat):
+                output, elapsed, _ = measure(stage, stage_input, False)
+                seconds.append(elapsed)
+            _, _, peak = measure(stage, stage_input, True)
+            stage_input = output
+            results.append(
+                {
+                    "commit": commit,
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "pandas": pd.__version__,
+                    "stage": name,
+                    "rows": num_rows,
+                    "seconds": min(seconds),
+                    "peak_bytes": peak,
+                    "rows_per_second": num_rows / max(min(seconds), 1e-9),
+                }
+            )
+    return results
+
+
+def measure_imports(module_names, repeat=5):
+    """
+    Times how long importing each module takes in a fresh Python process, the
+    way a short-lived worker or command line run would pay for it.
+
+    Args:
+        module_names: a list of strings with the names of the modules.
+        repeat: an int representing how many fresh processes to time each
+        import in; the fastest time is kept.
+
+    Returns: A list of dictionaries, one per module, shaped like the ones
+    returned by benchmark, with the stage named "import <module>" and rows
+    set to 0.
+    """
+    results = []
+    commit = current_commit()
+    for module_name in module_names:
+        script = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            f"import {module_name}\n"
+            "print(time.perf_counter() - start)"
+        )
+        seconds = min(
+            float(
+                subprocess.run(
+                    [sys.executable, "-c", script],
+                    capture_output=True,
+                    check=True,
+                    text=True,
+                ).stdout
+            )
+            for _ in range(repeat)
+        )
+        results.append(
+            {
+                "commit": commit,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "stage": f"import {module_name}",
+                "rows": 0,
+                "seconds": seconds,
+                "peak_bytes": None,
+                "rows_per_second": None,
+            }
+        )
+    return results
+
+
+def compare_results(old_results, new_results):
+    """
+    Lines up two sets of benchmark results by stage and number of rows.
+
+    Args:
+        old_results: a list of result dictionaries from an earlier run.
+        new_results: a list of result dictionaries from a later run.
+
+    Returns: A pandas dataframe indexed by stage and rows, with the old and
+    new seconds and peak bytes and the ratio of new time to old time (above
+    1 means the new code is slower).
+    """
+    columns = ["stage", "rows", "seconds", "peak_bytes"]
+    old = pd.DataFrame(old_results, columns=columns).groupby(["stage", "rows"])
+    new = pd.DataFrame(new_results, columns=columns).groupby(["stage", "rows"])
+    # the most recent result for each stage and size wins, and only stages
+    # and sizes run both times are compared
+    compared = old.last().join(
+        new.last(), how="inner", lsuffix="_old", rsuffix="_new"
+    )
+    compared["time_ratio"] = compared["seconds_new"] / compared["seconds_old"]
+    return compared
+
+
+def read_results(file_name):
+    """
+    Reads benchmark results written by this file.
+
+    Args:
+        file_name: a string representing the path of a results file.
+
+    Returns: A list of result dictionaries.
+    """
+    with open(file_name, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main():
+    """
+    Runs the benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ROWS,
+        help="dataset sizes to benchmark",
+    )
+    parser.add_argument(
+        "--imports",
+        nargs="*",
+        default=DEFAULT_IMPORTS,
+        help="modules whose import time to measure (none to skip)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="how many times to time each stage (the fastest is kept)",
+    )
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_OUTPUT,
+        help="JSON lines file the results are appended to",
+    )
+    parser.add_argument(
+        "--compare", help="earlier results file to compare this run against"
+    )
+    args = parser.parse_args()
+
+    results = []
+    for result in measure_imports(args.imports):
+        print(f"{result['stage']:>30} {result['seconds'] * 1000:10.1f} ms")
+        results.append(result)
+    for num_rows in args.rows:
+        for result in benchmark(num_rows, args.repeat):
+            print(
+                f"{result['stage']:>18} {result['rows']:>10} rows"
+                f" {result['seconds']:10.4f} s"
+                f" {result['peak_bytes'] / 2**20:10.1f} MiB"
+                f" {result['rows_per_second']:14.0f} rows/s"
+            )
+            results.append(result)
+    with open(args.output, "a", encoding="utf-8") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+    if args.compare:
+        print(compare_results(read_results(args.compare), results).to_string())
+
+
+if __name__ == "__main__":
+    main()
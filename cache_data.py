@@ -0,0 +1,297 @@
+"""
+This file contains helper functions for keeping processed copies of the
+dataset on disk, so that the csv only has to be parsed again when it changes.
+
+This file uses six imports to help cache the data: hashlib, json, os,
+pathlib, numpy, and pandas.
+It also fingerprints the csv with the hash_file function from fetch_data.py,
+so a cached copy is only used while the csv it was made from is unchanged.
+os, pathlib, and hashlib are used to name, write, and clean up the cached
+files.
+json is used to store the regions the geo locator has already found for each
+disaster name.
+pandas is used to write and read the cached dataframes in the Parquet format,
+a compressed column-by-column format that keeps every column's type.
+hashlib, json, numpy, and pandas are used to name and store the cached
+per-year sums behind organize_regions.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from lazy_import import lazy_import
+from fetch_data import hash_file
+from process_data import (
+    KEYWORD_FINGERPRINT,
+    read_csv_to_var,
+    parse_all_years,
+    locate_all_regions,
+    tally_regions,
+    spread_tally,
+    organize_spread,
+)
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# the folder cached files are written to unless another one is given
+CACHE_DIR = ".cache"
+# bump this whenever the columns or types of the cached dataframe change, so
+# that copies written by older code are ignored
+SCHEMA_VERSION = 1
+# the most bytes of per-year sums to keep in the cache folder; the sums used
+# least recently are removed first once there are more
+SPREAD_CACHE_BYTES = 64 << 20
+# the columns of the region dataframes the per-year sums are made from; the
+# other columns (like the names) do not change the sums, so they are not
+# fingerprinted
+TALLY_COLUMNS = [
+    "Disaster",
+    "Begin Date",
+    "Total CPI-Adjusted Cost (Millions of Dollars)",
+    "Deaths",
+]
+
+
+def dataset_cache_path(file_name, cache_dir=CACHE_DIR):
+    """
+    Works out where the cached copy of a csv lives. The name of the cached file
+    starts with the csv's name and a fingerprint of where it is, so csvs with
+    the same name in different folders (like those of different releases)
+    get their own copies. It then contains the fingerprint of the csv, the
+    fingerprint of the region keywords, and the schema version, so editing
+    the csv or the keywords or changing the schema points to a different
+    file.
+
+    Args:
+        file_name: a string representing the path of the csv.
+        cache_dir: a string representing the folder holding cached files.
+
+    Returns: A Path to the cached Parquet file (which may not exist yet).
+    """
+    digest = hash_file(file_name)[:16]
+    return Path(cache_dir) / (
+        f"{source_prefix(file_name)}-{digest}-{KEYWORD_FINGERPRINT}"
+        f"-v{SCHEMA_VERSION}.parquet"
+    )
+
+
+def source_prefix(file_name):
+    """
+    Names the csv a cached copy was made from: its name plus a fingerprint
+    of its full path.
+
+    Args:
+        file_name: a string representing the path of the csv.
+
+    Returns: A string like "events-US-1980-2023-1a2b3c4d".
+    """
+    location = str(Path(file_name).resolve()).encode("utf-8")
+    return f"{Path(file_name).stem}-{hashlib.sha256(location).hexdigest()[:8]}"
+
+
+def load_dataset(file_name, cache_dir=CACHE_DIR):
+    """
+    Given the file name of the csv, return the same dataframe as calling
+    read_csv_to_var and parse_all_years on it, plus a "Region" column filled
+    in by the vectorized region locator. The first call writes the result to
+    the cache folder; later calls read it back from there as long as the csv
+    has not changed. Cached copies of older versions of the same csv (at the
+    same path) are removed when a new one is written.
+
+    Args:
+        file_name: a string representing the path of the csv.
+        cache_dir: a string representing the folder holding cached files.
+
+    Returns: The processed pandas dataframe.
+    """
+    path = dataset_cache_path(file_name, cache_dir)
+    if path.exists():
+        return pd.read_parquet(path)
+
+    dataframe = read_csv_to_var(file_name)
+    parse_all_years(dataframe)
+    region_table = load_region_table(cache_dir)
+    known_names = len(region_table)
+    dataframe["Region"] = locate_all_regions(dataframe["Name"], region_table)
+    if len(region_table) > known_names:
+        save_region_table(region_table, cache_dir)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale_path in path.parent.glob(f"{source_prefix(file_name)}-*.parquet"):
+        stale_path.unlink()
+    # write to a temporary name first so an interrupted write never leaves a
+    # half-written file behind under the real name
+    temp_path = path.with_suffix(".tmp")
+    dataframe.to_parquet(temp_path, index=False)
+    os.replace(temp_path, path)
+    return dataframe
+
+
+def region_table_path(cache_dir=CACHE_DIR):
+    """
+    Works out where the table of already-located disaster names lives. The
+    name of the file contains the fingerprint of the region keywords, so
+    editing the keywords in process_data.py starts a new, empty table.
+
+    Args:
+        cache_dir: a string representing the folder holding cached files.
+
+    Returns: A Path to the JSON file (which may not exist yet).
+    """
+    return Path(cache_dir) / f"regions-{KEYWORD_FINGERPRINT}.json"
+
+
+def load_region_table(cache_dir=CACHE_DIR):
+    """
+    Reads the table of disaster names whose regions have already been found,
+    for the current region keywords.
+
+    Args:
+        cache_dir: a string representing the folder holding cached files.
+
+    Returns: A dictionary mapping disaster names to region names, which is
+    empty if no table has been saved for the current keywords.
+    """
+    try:
+        with open(region_table_path(cache_dir), encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_region_table(region_table, cache_dir=CACHE_DIR):
+    """
+    Writes the table of disaster names whose regions have been found, and
+    removes tables saved for older versions of the region keywords.
+
+    Args:
+        region_table: a dictionary mapping disaster names to region names.
+        cache_dir: a string representing the folder holding cached files.
+    """
+    path = region_table_path(cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for stale_path in path.parent.glob("regions-*.json"):
+        if stale_path != path:
+            stale_path.unlink()
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(region_table, file, indent=0, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+# these functions keep the per-year sums organize_regions buckets on disk, so
+# that trying different bucket sizes only redoes the bucketing
+def spread_cache_path(region_dict, yrs, drs, cache_dir=CACHE_DIR):
+    """
+    Works out where the per-year sums of some regions live. The name of the
+    file is a fingerprint of the schema version, of the columns of every
+    region's dataframe that are summed (TALLY_COLUMNS), and of the years and
+    disaster types asked for (with their types, since the year 1980 and the
+    year "1980" give different sums), so changing any of them points to a
+    different file. The bucket
+    size is left out, since the sums are kept before they are bucketed.
+
+    Args:
+        region_dict: a dictionary in which the keys are the names of US regions
+        and the values are dataframes containing their unorganized values.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        cache_dir: a string representing the folder holding cached files.
+
+    Returns: A Path to the cached .npy file (which may not exist yet).
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [
+                SCHEMA_VERSION,
+                [[type(year).__name__, str(year)] for year in yrs],
+                [[type(disaster).__name__, str(disaster)] for disaster in drs],
+            ]
+        ).encode("utf-8")
+    )
+    for region_name, frame in region_dict.items():
+        digest.update(json.dumps(str(region_name)).encode("utf-8"))
+        for column in TALLY_COLUMNS:
+            digest.update(
+                pd.util.hash_pandas_object(frame[column], index=False)
+                .to_numpy()
+                .tobytes()
+            )
+    return Path(cache_dir) / "spreads" / f"{digest.hexdigest()[:32]}.npy"
+
+
+def evict_spreads(cache_dir=CACHE_DIR, max_bytes=SPREAD_CACHE_BYTES):
+    """
+    Removes the cached per-year sums used least recently (the ones whose
+    files were last touched longest ago) until the rest fit in max_bytes. The
+    sums used most recently are always kept.
+
+    Args:
+        cache_dir: a string representing the folder holding cached files.
+        max_bytes: an int representing the most bytes of sums to keep.
+
+    Returns: A list of Paths to the files that were removed.
+    """
+    paths = sorted(
+        (Path(cache_dir) / "spreads").glob("*.npy"),
+        key=lambda path: path.stat().st_mtime_ns,
+        reverse=True,
+    )
+    removed = []
+    kept_bytes = 0
+    for i, path in enumerate(paths):
+        kept_bytes += path.stat().st_size
+        if i > 0 and kept_bytes > max_bytes:
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def cached_organize_regions(
+    region_dict,
+    yrs,
+    drs,
+    buckets,
+    cache_dir=CACHE_DIR,
+    max_bytes=SPREAD_CACHE_BYTES,
+):
+    """
+    Returns the same dictionaries as organize_regions, but keeps the per-year
+    sums it buckets in the cache folder. Later calls with the same region
+    dataframes, years, and disaster types read the sums back and only redo
+    the bucketing, whatever the bucket size.
+
+    Args:
+        region_dict: a dictionary in which the keys are the names of US regions
+        and the values are dataframes containing their unorganized values.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group (see the year buckets function).
+        cache_dir: a string representing the folder holding cached files.
+        max_bytes: an int representing the most bytes of sums to keep (see
+        evict_spreads).
+
+    Returns: A list containing two dictionaries; one for cost and deaths
+    respectively, shaped like the ones returned by organize_regions.
+    """
+    region_list = list(region_dict)
+    path = spread_cache_path(region_dict, yrs, drs, cache_dir)
+    if path.exists():
+        spread = np.load(path)
+        # touching the file marks it as recently used for evict_spreads
+        os.utime(path)
+    else:
+        spread = spread_tally(tally_regions(region_dict), region_list, yrs, drs)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as file:
+            np.save(file, spread)
+        os.replace(temp_path, path)
+        evict_spreads(cache_dir, max_bytes)
+    return organize_spread(spread, region_list, yrs, drs, buckets)
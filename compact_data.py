@@ -0,0 +1,299 @@
+"""
+This file contains the EventTable, a compact way of holding the events of the
+dataset for workloads that keep a lot of history in memory.
+
+A dataframe from read_csv_to_var holds every name, disaster type, and date of
+every row as its own Python string, and the region dataframes made by
+fill_one_region copy all of them again. An EventTable holds one small numpy
+array per column instead: disaster types and regions are int8 codes into
+dictionaries that tables can share, names are int32 codes into one array of
+distinct (interned) names, dates are int32 numbers like 20230415, years are
+int16, cost is float64 (or float32), and deaths are int32. Splitting a table
+into regions only copies these small arrays, never the strings, and a table
+can always be turned back into the usual dataframe.
+
+This file uses three imports to help compact the data: sys, numpy, and
+pandas.
+numpy is used to hold the columns and to sum them.
+pandas is used to encode a dataframe into codes and to decode it again.
+sys is used to intern the distinct names, so each is held in memory once.
+"""
+
+import sys
+
+from lazy_import import lazy_import
+from process_data import REGION_CATEGORIES, locate_all_regions
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# the columns of an EventTable and the types they are held as
+COMPACT_DTYPES = {
+    "name": "int32",
+    "disaster": "int8",
+    "region": "int8",
+    "begin_date": "int32",
+    "end_date": "int32",
+    "year": "int16",
+    "end_year": "int16",
+    "cost": "float64",
+    "deaths": "int32",
+}
+
+
+def encode_dates(date_column):
+    """
+    Turns a column of eight-character dates (like "20230415") into numbers.
+    Dates already shortened to four-character years by parse_all_years are
+    stored with zeros for the month and day (like 20230000).
+
+    Args:
+        date_column: a pandas series of date strings.
+
+    Returns: A numpy array of int32 dates.
+    """
+    dates = date_column.astype(str).str.ljust(8, "0")
+    return dates.astype(np.int32).to_numpy()
+
+
+def spread_columns(columns, region_list, yrs, drs):
+    """
+    Sums the cost and deaths of every region, disaster type, and year with
+    one weighted count per measure, given the coded columns of an EventTable
+    or of a stored release.
+
+    Args:
+        columns: a dictionary with numpy arrays under "cost", "deaths",
+        "year", "region" (codes into REGION_CATEGORIES), and "disaster"
+        (codes into the list under "disasters").
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years (as strings or ints).
+        drs: a list containing all possible disasters.
+
+    Returns: A numpy array of floats with the shape (2, regions, disasters,
+    years), like the one made by process_data.spread_tally.
+    """
+    shape = (len(region_list), len(drs), len(yrs))
+    # lookup tables from the stored codes to positions in the lists asked
+    # for; the trailing -1 is picked up by rows whose code is missing (-1)
+    region_lookup = np.append(
+        pd.Index(region_list).get_indexer(REGION_CATEGORIES), -1
+    )
+    disaster_lookup = np.append(
+        pd.Index(drs).get_indexer(columns["disasters"]), -1
+    )
+    regions = region_lookup[columns["region"]]
+    disasters = disaster_lookup[columns["disaster"]]
+    years = pd.Index([int(year) for year in yrs]).get_indexer(columns["year"])
+    keep = (regions >= 0) & (disasters >= 0) & (years >= 0)
+    cells = np.ravel_multi_index(
+        (regions[keep], disasters[keep], years[keep]), shape
+    )
+    spread = np.zeros((2, *shape))
+    for m, column in enumerate(["cost", "deaths"]):
+        spread[m] = np.bincount(
+            cells,
+            weights=columns[column][keep].astype(float),
+            minlength=int(np.prod(shape)),
+        ).reshape(shape)
+    return spread
+
+
+class EventTable:
+    """
+    The events of the dataset as small coded numpy arrays.
+
+    Attributes:
+        columns: a dictionary of numpy arrays, one per entry of
+        COMPACT_DTYPES, all the same length.
+        names: a numpy array of the distinct names the "name" codes point
+        into.
+        disasters: a list of the disaster types the "disaster" codes point
+        into. Tables split from the same table share it.
+        dates_parsed: a boolean; True if the dates were already shortened to
+        years when the table was made.
+    """
+
+    def __init__(self, columns, names, disasters, dates_parsed=False):
+        """
+        Wraps coded columns and their dictionaries.
+
+        Args:
+            columns: a dictionary of numpy arrays, one per entry of
+            COMPACT_DTYPES.
+            names: a numpy array of the distinct names.
+            disasters: a list of the disaster types.
+            dates_parsed: a boolean; True if the dates are only years.
+        """
+        self.columns = columns
+        self.names = names
+        self.disasters = disasters
+        self.dates_parsed = dates_parsed
+
+    @classmethod
+    def from_frame(cls, dataframe, disasters=None, cost_dtype="float64"):
+        """
+        Encodes a dataframe of disasters.
+
+        Args:
+            dataframe: a dataframe made by read_csv_to_var (its dates may have
+            been shortened by parse_all_years). If it has no "Region" column,
+            regions are found with the vectorized region locator.
+            disasters: an optional list of disaster types to code against, so
+            that several tables share one dictionary. Types not in it are
+            added to the end of it.
+            cost_dtype: "float64", or "float32" to halve the memory of the
+            cost column at the price of about seven significant digits.
+
+        Returns: An EventTable.
+        """
+        if "Region" in dataframe:
+            regions = dataframe["Region"]
+        else:
+            regions = locate_all_regions(dataframe["Name"])
+        disasters = [] if disasters is None else disasters
+        for disaster in dataframe["Disaster"].dropna().unique():
+            if disaster not in disasters:
+                disasters.append(str(disaster))
+        name_codes, names = pd.factorize(dataframe["Name"].astype(object))
+        begin_dates = encode_dates(dataframe["Begin Date"])
+        end_dates = encode_dates(dataframe["End Date"])
+        values = {
+            "name": name_codes,
+            "disaster": (
+                pd.Index(disasters).get_indexer(
+                    dataframe["Disaster"].astype(object)
+                )
+            ),
+            "region": (
+                pd.Index(REGION_CATEGORIES).get_indexer(regions.astype(object))
+            ),
+            "begin_date": begin_dates,
+            "end_date": end_dates,
+            "year": begin_dates // 10000,
+            "end_year": end_dates // 10000,
+            "cost": dataframe["Total CPI-Adjusted Cost (Millions of Dollars)"],
+            "deaths": dataframe["Deaths"],
+        }
+        dtypes = dict(COMPACT_DTYPES, cost=cost_dtype)
+        columns = {
+            column: np.asarray(value).astype(dtypes[column])
+            for column, value in values.items()
+        }
+        return cls(
+            columns,
+            np.array([sys.intern(name) for name in names], dtype=object),
+            disasters,
+            dates_parsed=bool(
+                len(dataframe)
+                and dataframe["Begin Date"].astype(str).str.len().max() == 4
+            ),
+        )
+
+    def __len__(self):
+        """
+        Returns: The number of events in the table.
+        """
+        return len(self.columns["name"])
+
+    def nbytes(self):
+        """
+        Adds up the memory the coded columns take.
+
+        Returns: An int representing the number of bytes of the columns
+        (the shared dictionaries are left out).
+        """
+        return sum(column.nbytes for column in self.columns.values())
+
+    def take(self, positions):
+        """
+        Picks some events out of the table. Only the coded columns are
+        copied; the new table shares the dictionaries of this one.
+
+        Args:
+            positions: a numpy array of row positions or booleans.
+
+        Returns: A new EventTable.
+        """
+        return EventTable(
+            {name: column[positions] for name, column in self.columns.items()},
+            self.names,
+            self.disasters,
+            self.dates_parsed,
+        )
+
+    def partition(self, region_list):
+        """
+        Splits the table into one table per region, like partition_regions
+        does for dataframes.
+
+        Args:
+            region_list: a list of strings representing the names of U.S.
+            regions.
+
+        Returns: A dictionary in which the keys are the names in region_list
+        and the values are EventTables of the disasters in each region.
+        """
+        return {
+            region_name: self.take(
+                self.columns["region"] == REGION_CATEGORIES.index(region_name)
+            )
+            for region_name in region_list
+        }
+
+    def spread(self, region_list, yrs, drs):
+        """
+        Sums the cost and deaths of every region, disaster type, and year.
+
+        Args:
+            region_list: a list of strings representing the names of US
+            regions.
+            yrs: a list containing all possible years.
+            drs: a list containing all possible disasters.
+
+        Returns: A numpy array of floats with the shape (2, regions,
+        disasters, years), like the one made by process_data.spread_tally.
+        """
+        return spread_columns(
+            dict(self.columns, disasters=self.disasters), region_list, yrs, drs
+        )
+
+    def to_frame(self):
+        """
+        Decodes the table into the dataframe layout of read_csv_to_var, with
+        a "Region" column added.
+
+        Returns: A pandas dataframe.
+        """
+        columns = self.columns
+        date_width = 4 if self.dates_parsed else 8
+        # missing names have the code -1, which picks up this trailing None
+        names = np.append(self.names, None)
+        return pd.DataFrame(
+            {
+                "Name": names[columns["name"]],
+                "Disaster": (
+                    pd.Categorical.from_codes(
+                        columns["disaster"], categories=self.disasters
+                    ).set_categories(sorted(self.disasters))
+                ),
+                "Begin Date": (
+                    pd.Series(columns["begin_date"])
+                    .astype(str)
+                    .str[:date_width]
+                ),
+                "End Date": (
+                    pd.Series(columns["end_date"]).astype(str).str[:date_width]
+                ),
+                "Total CPI-Adjusted Cost (Millions of Dollars)": (
+                    columns["cost"].astype("float64")
+                ),
+                "Deaths": columns["deaths"],
+                "Begin Year": columns["year"],
+                "End Year": columns["end_year"],
+                "Region": pd.Categorical.from_codes(
+                    columns["region"], categories=REGION_CATEGORIES
+                ),
+            }
+        )
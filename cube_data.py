@@ -0,0 +1,269 @@
+"""
+This file contains the RegionCube, a compact way of holding the processed
+cost and deaths of every region, disaster type, and year in one array.
+
+organize_regions hands back nested dictionaries of lists, which are easy to
+read but slow to slice and sum. A RegionCube keeps the same numbers in a
+single numpy array of floats with four axes (measure, region, disaster type,
+year) plus the labels of each axis, so any slice is a view into the array and
+bucketing years is one numpy call. The nested dictionaries can still be
+produced from it when they are needed.
+
+This file uses two imports to help organize the data: numpy and pandas.
+numpy is used to hold and slice the array.
+pandas is used to hand slices of the array over as plottable dataframes.
+"""
+
+from lazy_import import lazy_import
+from process_data import (
+    cumulative_sum,
+    rolling_sum,
+    spread_tally,
+    sum_in_buckets,
+    tally_regions,
+    year_buckets,
+    year_over_year,
+)
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class RegionCube:
+    """
+    The cost and deaths of every region, disaster type, and year, held in one
+    float64 array.
+
+    Attributes:
+        values: a numpy array of floats with the shape (2, regions,
+        disasters, years). The first entry along the first axis holds cost,
+        the second holds deaths.
+        regions: a list of the region labels, in axis order.
+        disasters: a list of the disaster type labels, in axis order.
+        years: a list of the year (or year bucket) labels, in axis order.
+    """
+
+    MEASURES = ("cost", "deaths")
+
+    def __init__(self, values, regions, disasters, years):
+        """
+        Wraps an array and its axis labels.
+
+        Args:
+            values: an array of numbers with the shape (2, regions, disasters,
+            years).
+            regions: a list of the region labels.
+            disasters: a list of the disaster type labels.
+            years: a list of the year labels.
+
+        Raises:
+            ValueError: if the shape of values does not match the labels.
+        """
+        self.values = np.asarray(values, dtype=np.float64)
+        self.regions = list(regions)
+        self.disasters = list(disasters)
+        self.years = list(years)
+        expected_shape = (
+            len(self.MEASURES),
+            len(self.regions),
+            len(self.disasters),
+            len(self.years),
+        )
+        if self.values.shape != expected_shape:
+            raise ValueError(
+                f"Cube values have shape {self.values.shape}, but the labels"
+                f" call for {expected_shape}"
+            )
+        self._positions = [
+            {label: i for i, label in enumerate(labels)}
+            for labels in (
+                self.MEASURES,
+                self.regions,
+                self.disasters,
+                self.years,
+            )
+        ]
+
+    @classmethod
+    def from_regions(cls, region_dict, yrs, drs):
+        """
+        Builds a cube from the same inputs as organize_regions, with one
+        entry per year (no bucketing).
+
+        Args:
+            region_dict: a dictionary in which the keys are the names of US
+            regions and the values are dataframes containing their
+            unorganized values.
+            yrs: a list containing all possible years.
+            drs: a list containing all possible disasters.
+
+        Returns: A RegionCube with the regions in the order of region_dict.
+        """
+        return cls.from_tally(
+            tally_regions(region_dict), list(region_dict), yrs, drs
+        )
+
+    @classmethod
+    def from_tally(cls, tally, region_list, yrs, drs):
+        """
+        Builds a cube from the sums made by the tally regions or tally events
+        function, with one entry per year (no bucketing).
+
+        Args:
+            tally: a dataframe made by tally_regions or tally_events.
+            region_list: a list of strings representing the names of US
+            regions.
+            yrs: a list containing all possible years.
+            drs: a list containing all possible disasters.
+
+        Returns: A RegionCube.
+        """
+        return cls(
+            spread_tally(tally, region_list, yrs, drs), region_list, drs, yrs
+        )
+
+    def select(self, measure, region=None, disaster=None, year=None):
+        """
+        Slices the cube by label. Leaving out a label keeps its whole axis.
+        The slice is a view into the cube, not a copy.
+
+        Args:
+            measure: "cost" or "deaths".
+            region: an optional region label.
+            disaster: an optional disaster type label.
+            year: an optional year label.
+
+        Returns: A numpy array (or a single float if every label is given).
+        """
+        index = tuple(
+            slice(None) if label is None else positions[label]
+            for label, positions in zip(
+                (measure, region, disaster, year), self._positions
+            )
+        )
+        return self.values[index]
+
+    def bucket(self, buckets):
+        """
+        Sums the years of the cube into buckets, the way organize_regions
+        does, and labels each bucket with its first and last year, like
+        "1980 - 1984".
+
+        Args:
+            buckets: an int representing the number of years in one group, or
+            a list of the first year of each group (see the year buckets
+            function in process_data.py).
+
+        Returns: A new RegionCube with one year entry per bucket.
+        """
+        starts, labels = year_buckets(self.years, buckets)
+        return RegionCube(
+            sum_in_buckets(self.values, starts),
+            self.regions,
+            self.disasters,
+            labels,
+        )
+
+    def rolling(self, window):
+        """
+        Sums every year of the cube with the years before it, over a moving
+        window of calendar years (see the rolling sum function in
+        process_data.py).
+
+        Args:
+            window: an int representing the number of years to sum over.
+
+        Returns: A new RegionCube with the same labels.
+
+        Raises:
+            ValueError: if the years of the cube were bucketed.
+        """
+        return RegionCube(
+            rolling_sum(self.values, self.years, window),
+            self.regions,
+            self.disasters,
+            self.years,
+        )
+
+    def cumulative(self):
+        """
+        Gives the running total of every year and all of the years before it.
+
+        Returns: A new RegionCube with the same labels.
+        """
+        return RegionCube(
+            cumulative_sum(self.values),
+            self.regions,
+            self.disasters,
+            self.years,
+        )
+
+    def growth(self):
+        """
+        Gives the growth of every year over the calendar year before it, as a
+        fraction (see the year over year function in process_data.py).
+
+        Returns: A new RegionCube with the same labels.
+
+        Raises:
+            ValueError: if the years of the cube were bucketed.
+        """
+        return RegionCube(
+            year_over_year(self.values, self.years),
+            self.regions,
+            self.disasters,
+            self.years,
+        )
+
+    def to_dicts(self):
+        """
+        Converts the cube into the nested dictionaries that organize_regions
+        returns.
+
+        Returns: A list containing two dictionaries; one for cost and deaths
+        respectively. Each maps region names to dictionaries that map disaster
+        types to lists of damages per year.
+        """
+        return tuple(
+            {
+                region_name: dict(
+                    zip(self.disasters, self.values[m, r].tolist())
+                )
+                for r, region_name in enumerate(self.regions)
+            }
+            for m in range(len(self.MEASURES))
+        )
+
+    def by_time(self, measure, region):
+        """
+        Gives one region's damages as a dataframe with the years as rows and
+        the disaster types as columns, like plottable_by_time does.
+
+        Args:
+            measure: "cost" or "deaths".
+            region: a region label.
+
+        Returns: A pandas dataframe.
+        """
+        return pd.DataFrame(
+            self.select(measure, region).T,
+            index=self.years,
+            columns=self.disasters,
+        )
+
+    def by_region(self, measure):
+        """
+        Gives every region's damages summed over all years as a dataframe
+        with the regions as rows and the disaster types as columns, like
+        plottable_by_region does.
+
+        Args:
+            measure: "cost" or "deaths".
+
+        Returns: A pandas dataframe.
+        """
+        return pd.DataFrame(
+            self.select(measure).sum(axis=-1),
+            index=self.regions,
+            columns=self.disasters,
+        )
@@ -2,27 +2,246 @@
 This file contains code for fetching online data and porting it to a local
 variable in the folder.
 
-This file uses two imports to help retrieve the data: tarfile and
-requests.
+This file uses nine imports to help retrieve the data: asyncio, contextlib,
+fnmatch, hashlib, json, os, tarfile, urllib, and requests.
 requests is used to query the National Centers for Environmental Information
-(NCEI) for the dataset that we want to use and put it in a folder (line 24).
-tarfile is used to extract the data (line 33) from its natural format
-(a tar file that upon extraction yields a csv we can analyze with pandas).
-
-This file is not worth pytesting because it only has one function with no
-return statement.
+(NCEI) for the dataset that we want to use and stream it into a file on disk.
+hashlib is used to checksum the downloaded file before it is extracted.
+json and os are used to keep a small record next to the download (its ETag,
+Last-Modified date, and checksum) so that unchanged archives are not
+downloaded again and interrupted downloads can pick up where they stopped.
+tarfile is used to extract the data from its natural format (a tar file that
+upon extraction yields a csv we can analyze with pandas).
+fnmatch and contextlib are used to pick out and hand over only the files in
+the archive that we actually read, without extracting the rest.
+asyncio and urllib are used to download several archives at once while
+limiting how many are downloaded from each host at a time.
+requests is imported lazily (see lazy_import.py), so it is only loaded once
+something is actually downloaded.
 """
 
+import asyncio
+import contextlib
+import fnmatch
+import hashlib
+import json
+import os
 import tarfile
-import requests
+from urllib.parse import urlsplit
+
+from lazy_import import lazy_import
+
+requests = lazy_import("requests")
+
+
+# how many bytes of the archive to write to disk at a time
+CHUNK_SIZE = 1 << 16
+# the file in the NCEI archive that holds the events we analyze
+EVENTS_CSV_PATTERN = "*/data/0-data/events-US-*.csv"
+# server responses worth trying a download again after
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def hash_file(file_name, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 fingerprint of a file, reading it in chunks so that
+    large files do not have to fit in memory.
+
+    Args:
+        file_name: a string representing the path of the file to hash.
+        chunk_size: an int representing how many bytes to read at a time.
+
+    Returns: A string with the hexadecimal digest of the file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
-def write_to_csv(request, tarpath):
+def read_download_record(tarpath):
+    """
+    Reads the record kept next to a downloaded archive.
+
+    Args:
+        tarpath: a string representing the path of the downloaded archive.
+
+    Returns: A dictionary with what is known about the download, which is
+    empty if the archive has never been downloaded.
+    """
+    try:
+        with open(f"{tarpath}.json", encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_download_record(tarpath, record):
+    """
+    Writes the record kept next to a downloaded archive.
+
+    Args:
+        tarpath: a string representing the path of the downloaded archive.
+        record: a dictionary with what is known about the download.
+    """
+    with open(f"{tarpath}.json", "w", encoding="utf-8") as file:
+        json.dump(record, file, indent=2)
+
+
+def download_archive(url, tarpath, checksum=None, timeout=30, session=None):
+    """
+    Given a link to a file and a destination path, stream the file to disk in
+    chunks. The download is skipped if the server reports that the file has
+    not changed since it was last downloaded (using the ETag and Last-Modified
+    headers it sent back then). The file is first written to tarpath + ".part"
+    and, if that is interrupted, the next call asks the server for only the
+    missing bytes. The finished file is checksummed before it is moved to
+    tarpath.
+
+    Args:
+        url: a string representing the link to download.
+        tarpath: a string representing the destination path of the file.
+        checksum: an optional string with the expected SHA-256 digest of the
+        file. If it does not match, the download is thrown away.
+        timeout: the number of seconds to wait for the server to respond.
+        session: an optional requests session to reuse connections from.
+
+    Returns: True if a new copy of the file was downloaded, False if the copy
+    already on disk is still current.
+
+    Raises:
+        ValueError: if the downloaded file does not match checksum.
+        requests.HTTPError: if the server responds with an error.
+    """
+    record = read_download_record(tarpath)
+    part_path = f"{tarpath}.part"
+    resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {}
+    if resume_from:
+        headers["Range"] = f"bytes={resume_from}-"
+        # only resume if the server still has the version we started on
+        validator = record.get("partial_etag") or record.get(
+            "partial_last_modified"
+        )
+        if validator:
+            headers["If-Range"] = validator
+    elif os.path.exists(tarpath):
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+
+    with (session or requests).get(
+        url, headers=headers, stream=True, timeout=timeout
+    ) as response:
+        if response.status_code == 304:
+            if hash_file(tarpath) == record.get("sha256"):
+                return False
+            # the copy on disk was damaged since it was downloaded
+            write_download_record(tarpath, {})
+            return download_archive(url, tarpath, checksum, timeout, session)
+        if response.status_code == 416:
+            # the partial file is already as long as the server's file, so the
+            # transfer finished before it was interrupted; it only has to be
+            # checked and moved into place, unless the server reports a
+            # different length
+            length = response.headers.get("Content-Range", "").rpartition("/")
+            if length[2].isdigit() and int(length[2]) != resume_from:
+                os.remove(part_path)
+                return download_archive(
+                    url, tarpath, checksum, timeout, session
+                )
+        else:
+            response.raise_for_status()
+            record["partial_etag"] = response.headers.get("ETag")
+            record["partial_last_modified"] = response.headers.get(
+                "Last-Modified"
+            )
+            write_download_record(tarpath, record)
+            mode = "ab" if response.status_code == 206 else "wb"
+            with open(part_path, mode) as file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    file.write(chunk)
+
+    digest = hash_file(part_path)
+    if checksum is not None and digest != checksum:
+        os.remove(part_path)
+        raise ValueError(f"Checksum of {url} is {digest}, expected {checksum}")
+    os.replace(part_path, tarpath)
+    write_download_record(
+        tarpath,
+        {
+            "etag": record.get("partial_etag"),
+            "last_modified": record.get("partial_last_modified"),
+            "sha256": digest,
+        },
+    )
+    return True
+
+
+def extract_members(tarpath, pattern=EVENTS_CSV_PATTERN, destination="."):
+    """
+    Reads through a tar.gz archive once, from start to finish, and extracts
+    only the files whose paths match a pattern. Everything else in the archive
+    (maps, PDFs, metadata) is skipped without being written to disk.
+
+    Args:
+        tarpath: a string representing the path of the archive.
+        pattern: a shell-style pattern (like "*/data/*.csv") that the paths
+        of the files to extract must match.
+        destination: a string representing the folder to extract into.
+
+    Returns: A list of strings with the paths of the extracted files, as they
+    appear in the archive.
+    """
+    extracted = []
+    with tarfile.open(tarpath, "r|gz") as tar_file:
+        for member in tar_file:
+            if member.isfile() and fnmatch.fnmatch(member.name, pattern):
+                tar_file.extract(member, destination, filter="fully_trusted")
+                extracted.append(member.name)
+    return extracted
+
+
+@contextlib.contextmanager
+def open_member(tarpath, pattern=EVENTS_CSV_PATTERN):
+    """
+    Reads through a tar.gz archive until it finds the first file whose path
+    matches a pattern, and hands that file over without extracting it to disk.
+    Files after it in the archive are never read.
+    For example, the events csv can be loaded straight from the archive with:
+
+        with open_member(tarpath) as csv_file:
+            dataframe = process_data.read_csv_to_var(csv_file)
+
+    Args:
+        tarpath: a string representing the path of the archive.
+        pattern: a shell-style pattern that the path of the file must match.
+
+    Returns: A context manager giving a binary file object that can only be
+    read inside the with block.
+
+    Raises:
+        FileNotFoundError: if no file in the archive matches the pattern.
+    """
+    # unlike extract_members, this opens the archive in seekable mode, since
+    # pandas needs to be able to seek in the file it is given
+    with tarfile.open(tarpath, "r:gz") as tar_file:
+        for member in tar_file:
+            if member.isfile() and fnmatch.fnmatch(member.name, pattern):
+                yield tar_file.extractfile(member)
+                return
+    raise FileNotFoundError(f"No file in {tarpath} matches {pattern}")
+
+
+def write_to_csv(request, tarpath, checksum=None, pattern=None):
     """
     Given a website link to a file containing a dataset and the name of a
     destination folder (which must have the same name as the folder being
     downloaded and extracted), create the destination folder with the extracted
-    dataset in it.
+    dataset in it. Nothing is downloaded or extracted if the archive on disk
+    is already the newest one.
 
     Args:
         request: a string representing the link to the download for the NCEI
@@ -30,17 +249,184 @@ def write_to_csv(request, tarpath):
         without downloading and using the dataset.
         tarpath: a string representing the destination folder for the
         downloaded and extracted dataset.
+        checksum: an optional string with the expected SHA-256 digest of the
+        archive.
+        pattern: an optional shell-style pattern. If given, only the files in
+        the archive whose paths match it are extracted (EVENTS_CSV_PATTERN
+        extracts just the events csv); otherwise everything is extracted.
     """
-    request = requests.get(request, timeout=30)
-    target_path = tarpath
     try:
-        # check the status code
-        # extract tar file to project folder
-        with open(target_path, "wb") as file:
-            file.write(request.content)
-
-        with tarfile.open(target_path, "r:gz") as tar_file:
-            tar_file.extractall(filter="fully_trusted")
+        # download the tar file, then extract it to the project folder
+        if download_archive(request, tarpath, checksum):
+            if pattern is not None:
+                extract_members(tarpath, pattern)
+            else:
+                with tarfile.open(tarpath, "r:gz") as tar_file:
+                    tar_file.extractall(filter="fully_trusted")
 
     except FileNotFoundError:
         print("File name does not exist; please try again")
+
+
+# these functions download several archives at once, for example every
+# accession and release that is pulled each night
+def make_session(pool_size):
+    """
+    Makes a requests session that keeps up to pool_size connections to each
+    host open, so that concurrent downloads reuse them.
+
+    Args:
+        pool_size: an int representing the number of connections to keep.
+
+    Returns: A requests session.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def should_retry(error):
+    """
+    Decides whether a failed download is worth trying again: dropped
+    connections, timeouts, and busy or failing servers are; anything else
+    (like a missing file or a bad checksum) is not.
+
+    Args:
+        error: the exception the download raised.
+
+    Returns: A boolean; True if the download should be tried again.
+    """
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and (
+            error.response.status_code in RETRY_STATUSES
+        )
+    return isinstance(
+        error,
+        (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ),
+    )
+
+
+async def fetch_archive(url, tarpath, session, limit, options):
+    """
+    Downloads one archive in a worker thread, trying again with exponentially
+    longer waits when the download fails in a way that might not last, and
+    extracts it next to tarpath as soon as it is downloaded. An interrupted
+    download picks up where it stopped (see download_archive).
+
+    Args:
+        url: a string representing the link to download.
+        tarpath: a string representing the destination path of the archive.
+        session: the requests session to download with.
+        limit: the asyncio semaphore of the archive's host.
+        options: a dictionary with the "retries", "backoff", "checksum",
+        "pattern", and "timeout" given to fetch_archives.
+
+    Returns: A list of strings with the paths of the extracted files, which
+    is empty if the archive on disk was already current.
+    """
+    for attempt in range(options["retries"] + 1):
+        try:
+            async with limit:
+                downloaded = await asyncio.to_thread(
+                    download_archive,
+                    url,
+                    tarpath,
+                    options["checksum"].get(url),
+                    options["timeout"],
+                    session,
+                )
+            break
+        except Exception as error:  # pylint: disable=broad-except
+            if attempt == options["retries"] or not should_retry(error):
+                raise
+            await asyncio.sleep(options["backoff"] * 2**attempt)
+    if not downloaded:
+        return []
+    return await asyncio.to_thread(
+        extract_members,
+        tarpath,
+        options["pattern"],
+        os.path.dirname(tarpath) or ".",
+    )
+
+
+async def fetch_archives(
+    downloads,
+    per_host=2,
+    retries=3,
+    backoff=1.0,
+    checksums=None,
+    pattern=EVENTS_CSV_PATTERN,
+    timeout=30,
+):
+    """
+    Downloads several archives at once over one pool of connections and
+    extracts each one as soon as it is done, while the rest are still
+    downloading. The downloads themselves run in worker threads, since
+    requests is not asynchronous.
+
+    Args:
+        downloads: a dictionary in which the keys are the links to download
+        and the values are the destination paths of the archives.
+        per_host: an int representing the most archives to download from one
+        host at the same time.
+        retries: an int representing how many times to try a failed download
+        again.
+        backoff: the number of seconds to wait before the first retry; each
+        retry after it waits twice as long as the one before.
+        checksums: an optional dictionary from links to the expected SHA-256
+        digests of their archives.
+        pattern: a shell-style pattern that the paths of the files to extract
+        must match (see extract_members).
+        timeout: the number of seconds to wait for a server to respond.
+
+    Returns: A dictionary in which the keys are the links and the values are
+    lists of the files extracted from them (empty if the archive on disk was
+    already current).
+
+    Raises:
+        ValueError: if a downloaded archive does not match its checksum.
+        requests.HTTPError: if a server keeps responding with an error.
+    """
+    hosts = {urlsplit(url).netloc for url in downloads}
+    limits = {host: asyncio.Semaphore(per_host) for host in hosts}
+    options = {
+        "retries": retries,
+        "backoff": backoff,
+        "checksum": checksums or {},
+        "pattern": pattern,
+        "timeout": timeout,
+    }
+    with make_session(per_host * max(len(hosts), 1)) as session:
+        results = await asyncio.gather(
+            *(
+                fetch_archive(
+                    url, tarpath, session, limits[urlsplit(url).netloc], options
+                )
+                for url, tarpath in downloads.items()
+            )
+        )
+    return dict(zip(downloads, results))
+
+
+def fetch_all(downloads, **kwargs):
+    """
+    Runs fetch_archives from code that is not asynchronous itself, like the
+    nightly download script.
+
+    Args:
+        downloads: a dictionary from links to the destination paths of their
+        archives.
+        kwargs: any of the other arguments of fetch_archives.
+
+    Returns: The dictionary fetch_archives returns.
+    """
+    return asyncio.run(fetch_archives(downloads, **kwargs))
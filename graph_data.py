@@ -1,18 +1,43 @@
 """
 Functions that graph pre-processed data.
 
-This file uses one import to help graph the data: pandas.
+This file uses six imports to help graph the data: concurrent.futures,
+hashlib, json, os, pathlib, and pandas (matplotlib is only imported by the
+processes that draw figures to files).
 pandas is used to manipulate pandas dataframes so they can be turned into
 effective visualizations.
+concurrent.futures and os are used to draw many figures to files at once,
+one worker process per core.
+hashlib, json, and pathlib are used to remember which files already show the
+current data, so they are not drawn again.
+pandas is imported lazily (see lazy_import.py), so importing this file is
+quick and pandas is only loaded when a function that needs it runs.
 
 This file is not worth pytesting because it's simply re-structuring data to
-be plotted and is not worth the effort for the test cases.
+be plotted and is not worth the effort for the test cases. (The RegionCube
+versions of the plottable functions are checked against the dictionary
+versions in test_cube_data.py, and the batch rendering in test_graph_data.py
+since it decides what to draw again.)
 """
 
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+from pathlib import Path
 
+from lazy_import import lazy_import
 
-def plot_dataframe(dataframe, rotation, labels):
+pd = lazy_import("pandas")
+
+
+# where the record of already drawn figure files is kept by default
+RENDER_MANIFEST = ".cache/figures.json"
+# the size of figures drawn to files, in inches
+FIGURE_SIZE = (8, 5)
+
+
+def plot_dataframe(dataframe, rotation, labels, ax=None):
     """
     Given a dataframe and an int to help determine the orientation of the
     graph, plot a bar plot from the dataframe.
@@ -24,8 +49,11 @@ def plot_dataframe(dataframe, rotation, labels):
         labels: A list of strings in which the first item is the x-axis label
         and the second item is the y-axis label, and the third item is the graph
         title.
+        ax: An optional matplotlib axes to draw on. By default, the plot is
+        drawn on the current pyplot figure, as in the notebook.
     """
     dataframe.plot.bar(
+        ax=ax,
         rot=rotation,
         stacked=True,
         xlabel=labels[0],
@@ -86,3 +114,166 @@ def plottable_by_region(region_dict, drs):
         regions_sums, orient="index", columns=drs
     )
     return plottable_df
+
+
+def plottable_cube_by_time(cube, measure, region_name):
+    """
+    Same as plottable_by_time, but reads the data of ONE region straight out
+    of a RegionCube (see cube_data.py) instead of a dictionary. The rows are
+    labeled with the cube's years (or year buckets, if the cube was
+    bucketed).
+
+    Args:
+        cube: A RegionCube holding the damages of every region.
+        measure: A string, "cost" or "deaths", choosing what to plot.
+        region_name: A string representing the name of a particular region
+        whose data will be copied into a plottable dataframe.
+
+    Returns: A dataframe that can be easily plotted such that the x-axis
+    is in years and the y-axis is damages.
+    """
+    return cube.by_time(measure, region_name)
+
+
+def plottable_cube_by_region(cube, measure):
+    """
+    Same as plottable_by_region, but sums the data of ALL regions straight
+    out of a RegionCube (see cube_data.py) in one array operation.
+
+    Args:
+        cube: A RegionCube holding the damages of every region.
+        measure: A string, "cost" or "deaths", choosing what to plot.
+
+    Returns: A dataframe that can be easily plotted such that the x-axis
+    shows regions and the y-axis is damages/deaths.
+    """
+    return cube.by_region(measure)
+
+
+# these functions draw many plots to image files at once, without pyplot
+def plot_spec(dataframe, path, rotation=0, labels=("", "", "")):
+    """
+    Describes one plot to draw to a file with render_figures.
+
+    Args:
+        dataframe: A dataframe containing the data to plot, like the ones
+        made by the plottable functions.
+        path: A string representing the file to draw to. Its extension
+        (".png", ".svg", ...) picks the image format.
+        rotation: An int representing the angle by which to rotate the x-axis
+        labels.
+        labels: A list of strings with the x-axis label, the y-axis label,
+        and the graph title.
+
+    Returns: A dictionary describing the plot.
+    """
+    return {
+        "dataframe": dataframe,
+        "path": str(path),
+        "rotation": rotation,
+        "labels": list(labels),
+    }
+
+
+def spec_hash(spec):
+    """
+    Fingerprints everything that goes into drawing a plot: the data, its row
+    and column labels, the rotation, and the axis labels and title.
+
+    Args:
+        spec: A dictionary made by plot_spec.
+
+    Returns: A string with the hexadecimal SHA-256 digest.
+    """
+    dataframe = spec["dataframe"]
+    digest = hashlib.sha256()
+    digest.update(
+        pd.util.hash_pandas_object(dataframe, index=True).to_numpy().tobytes()
+    )
+    digest.update(
+        json.dumps(
+            [
+                [str(column) for column in dataframe.columns],
+                spec["rotation"],
+                spec["labels"],
+                FIGURE_SIZE,
+            ]
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def render_figure(spec):
+    """
+    Draws one plot to its file. The figure is made without pyplot and on the
+    Agg backend, so nothing is shown on screen and the figure is freed once
+    it is saved instead of piling up in pyplot's list of open figures.
+
+    Args:
+        spec: A dictionary made by plot_spec.
+
+    Returns: The string path of the file drawn.
+    """
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(figure)
+    plot_dataframe(
+        spec["dataframe"],
+        spec["rotation"],
+        spec["labels"],
+        ax=figure.subplots(),
+    )
+    Path(spec["path"]).parent.mkdir(parents=True, exist_ok=True)
+    figure.savefig(spec["path"], bbox_inches="tight")
+    figure.clear()
+    return spec["path"]
+
+
+def render_figures(specs, manifest_path=RENDER_MANIFEST, max_workers=None):
+    """
+    Draws many plots to files in parallel worker processes. A plot is only
+    drawn again if its data, labels, or file changed since it was last drawn
+    (according to the manifest, a record of the fingerprint of each file
+    drawn) or if its file is missing.
+
+    Args:
+        specs: A list of dictionaries made by plot_spec.
+        manifest_path: A string representing where the manifest is kept.
+        max_workers: An optional int representing the most processes to draw
+        with at once. By default, one per core.
+
+    Returns: A list of the string paths of the files that were drawn; files
+    that were already up to date are left out.
+    """
+    manifest_path = Path(manifest_path)
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+
+    stale = []
+    for spec in specs:
+        digest = spec_hash(spec)
+        if (
+            manifest.get(spec["path"]) != digest
+            or not Path(spec["path"]).exists()
+        ):
+            stale.append((spec, digest))
+    if not stale:
+        return []
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(stale))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rendered = list(
+            executor.map(render_figure, [spec for spec, _ in stale])
+        )
+    for spec, digest in stale:
+        manifest[spec["path"]] = digest
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(
+        json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8"
+    )
+    return rendered
@@ -0,0 +1,189 @@
+"""
+This file contains the EventIndex, a copy of the dataset sorted so that
+splitting it by region, disaster type, and year does not have to scan it.
+
+generic_split_data has to look through the whole dataframe every time it is
+called, and assemble_region_data calls it for every disaster type of every
+region. An EventIndex sorts the rows once by
+region, then disaster type, then starting year, and keeps a table of where
+each (region, disaster type, year) group starts. Looking up a group is then
+a matter of reading two offsets from the table, and the rows come back as a
+slice of the sorted dataframe (a view, not a copy) as long as the labels
+given are a region, a region and disaster type, or all three. Other
+combinations (like one disaster type in every region) are gathered from one
+slice per region.
+
+This file uses three imports to help index the data: itertools, numpy, and
+pandas.
+numpy is used to sort the rows and build the table of offsets.
+pandas is used to label the rows and slice the sorted dataframe.
+itertools is used to list the groups a lookup covers.
+"""
+
+import itertools
+
+from lazy_import import lazy_import
+from process_data import locate_all_regions
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class EventIndex:
+    """
+    A dataset sorted by region, disaster type, and starting year, with a
+    table of where each group of rows starts.
+
+    Attributes:
+        frame: the sorted dataframe, indexed from zero.
+        labels: a tuple of three lists with the regions, disaster types, and
+        starting years found in the dataset, in sorted order.
+        offsets: a numpy array of ints. The rows of the group with codes
+        (r, d, y) are frame rows offsets[i] to offsets[i + 1], where i is the
+        position of (r, d, y) when every group is listed region by region,
+        then disaster type by disaster type, then year by year.
+    """
+
+    KEYS = ("Region", "Disaster", "Begin Year")
+
+    def __init__(self, dataframe):
+        """
+        Sorts a dataset and builds its table of offsets.
+
+        Args:
+            dataframe: a dataframe made by read_csv_to_var. If it has no
+            "Region" column, one is added to the sorted copy with the
+            vectorized region locator.
+        """
+        if "Region" not in dataframe:
+            dataframe = dataframe.assign(
+                Region=locate_all_regions(dataframe["Name"])
+            )
+        codes = []
+        labels = []
+        for key in self.KEYS:
+            key_codes, key_labels = pd.factorize(
+                dataframe[key], sort=True, use_na_sentinel=False
+            )
+            codes.append(key_codes)
+            labels.append(key_labels.tolist())
+        self.labels = tuple(labels)
+        self._sizes = tuple(len(key_labels) for key_labels in labels)
+        self._codes = [
+            {label: i for i, label in enumerate(key_labels)}
+            for key_labels in labels
+        ]
+
+        # the position of each row's group in the table of offsets
+        group = (
+            np.ravel_multi_index(codes, self._sizes)
+            if len(dataframe)
+            else np.array([], dtype=np.intp)
+        )
+        order = np.argsort(group, kind="stable")
+        self.frame = dataframe.iloc[order].reset_index(drop=True)
+        self.offsets = np.searchsorted(
+            group[order], np.arange(np.prod(self._sizes) + 1)
+        )
+
+    def _ranges(self, region, disaster, year):
+        """
+        Works out which rows of the sorted dataframe hold the groups matching
+        some labels.
+
+        Args:
+            region: a region label, or None for all.
+            disaster: a disaster type label, or None for all.
+            year: a starting year, or None for all.
+
+        Returns: A list of (start, stop) pairs of row positions.
+        """
+        codes = []
+        for label, positions in zip((region, disaster, year), self._codes):
+            if label is None:
+                codes.append(None)
+            elif label in positions:
+                codes.append(positions[label])
+            else:
+                return []
+        # trailing keys that are not given make one block per combination of
+        # the keys before them, since the rows are sorted by those keys first
+        fixed = len(codes)
+        block = 1
+        while fixed > 0 and codes[fixed - 1] is None:
+            fixed -= 1
+            block *= self._sizes[fixed]
+        choices = [
+            range(size) if code is None else [code]
+            for code, size in zip(codes[:fixed], self._sizes[:fixed])
+        ]
+        ranges = []
+        for combination in itertools.product(*choices):
+            start = (
+                np.ravel_multi_index(combination, self._sizes[:fixed])
+                if fixed
+                else 0
+            ) * block
+            ranges.append((self.offsets[start], self.offsets[start + block]))
+        return ranges
+
+    def select(self, region=None, disaster=None, year=None):
+        """
+        Gives the rows of the dataset that match some labels. Leaving out a
+        label keeps every value of it.
+
+        Args:
+            region: an optional region label.
+            disaster: an optional disaster type label.
+            year: an optional starting year, as an int.
+
+        Returns: A dataframe of the matching rows. It is a view of the sorted
+        dataframe when the labels given are a region, a region and disaster
+        type, or all three (or none at all); otherwise it is a copy.
+        """
+        ranges = self._ranges(region, disaster, year)
+        if len(ranges) == 1:
+            return self.frame.iloc[ranges[0][0] : ranges[0][1]]
+        positions = [np.arange(start, stop) for start, stop in ranges]
+        return self.frame.iloc[np.concatenate(positions) if positions else []]
+
+    def split(self, by, region=None, disaster=None):
+        """
+        Splits the rows matching some labels into one dataframe per value of
+        a column, like generic_split_data does.
+
+        Args:
+            by: the column to split by: "Region", "Disaster", or
+            "Begin Year".
+            region: an optional region label to split the rows of.
+            disaster: an optional disaster type label to split the rows of.
+
+        Returns: A dictionary in which the keys are the values of the column
+        found in the dataset and the values are dataframes of their rows.
+        """
+        axis = self.KEYS.index(by)
+        labels = {"region": region, "disaster": disaster, "year": None}
+        split = {}
+        for label in self.labels[axis]:
+            labels[("region", "disaster", "year")[axis]] = label
+            split[label] = self.select(**labels)
+        return split
+
+    def partition(self, region_list):
+        """
+        Splits the dataset into one dataframe per region, like
+        partition_regions does, except that every region is a view of the
+        sorted dataframe.
+
+        Args:
+            region_list: a list of strings representing the names of U.S.
+            regions.
+
+        Returns: A dictionary in which the keys are the names in region_list
+        and the values are dataframes with the natural disasters that
+        affected each region.
+        """
+        return {
+            region_name: self.select(region=region_name)
+            for region_name in region_list
+        }
@@ -0,0 +1,46 @@
+"""
+This file contains a helper for importing the heavy libraries this project
+uses (pandas, numpy, requests) only when they are first used.
+
+Importing pandas alone takes a large fraction of a second, and every module
+of the pipeline used to import it (and requests) up front, even in short
+runs that only fetch the archive or only read cached results. A module
+imported with lazy_import is registered right away but only actually loaded
+the first time one of its attributes is looked up, so importing the
+pipeline modules costs next to nothing until their functions are called.
+
+This file uses two imports to help import lazily: importlib and sys.
+importlib is used to find a module and load it lazily.
+sys is used to register the module so that it is only ever loaded once.
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Imports a module without running it until one of its attributes is used.
+    If the module was already imported (lazily or not), that module is
+    returned instead.
+
+    Args:
+        name: a string representing the full name of the module, like
+        "pandas".
+
+    Returns: The module.
+
+    Raises:
+        ModuleNotFoundError: if the module is not installed.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -2,15 +2,53 @@
 This file contains helper functions for processing the data in our CSV into
 useful, bite-size dataframes that can be used to plot information.
 
-This file uses two imports to help process the data: pandas and math.
+This file uses seven imports to help process the data: pandas, numpy, math,
+re, functools, hashlib, and json.
 pandas is used to convert the data in csv format to a pandas dataframe which we
 can parse much more easily.
+numpy is used to work on whole columns of the data at once.
 math is used to help divide the years covered by the dataset into more
 digestible groups with the ceil function.
+re is used to compile the region keywords into patterns that can search a
+whole column of disaster names at once.
+functools is used to remember the region of names the geo locator has
+already seen, and hashlib and json to fingerprint the region keywords so that
+remembered regions can be thrown out when the keywords change.
+pandas and numpy are imported lazily (see lazy_import.py), so importing this
+file is quick and they are only loaded when a function that needs them runs.
 """
 
+import functools
+import hashlib
+import json
 import math
-import pandas as pd
+import re
+
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# the columns of the csv and the types they are loaded as; dates are kept as
+# strings so that parse_all_years can still shorten them to years
+CSV_DTYPES = {
+    "Name": str,
+    "Disaster": "category",
+    "Begin Date": str,
+    "End Date": str,
+    "Total CPI-Adjusted Cost (Millions of Dollars)": "float64",
+    "Deaths": "int32",
+}
+# how the csv is read, shared by read_csv_to_var and the chunked reader
+CSV_READ_OPTIONS = {
+    "skiprows": 1,
+    "header": 0,
+    "names": list(CSV_DTYPES),
+    "dtype": CSV_DTYPES,
+}
+# how many rows organize_csv_in_chunks reads at a time unless told otherwise
+CHUNK_ROWS = 100_000
 
 
 # this function writes the csv to a variable
@@ -18,26 +56,21 @@ def read_csv_to_var(file_name):
     """
     Given the file name of the csv which is the component of the downloaded
     dataset that we used to generate our visualizations, convert the data in it
-    to a properly formatted pandas dataframe.
+    to a properly formatted pandas dataframe. The title line above the header
+    is skipped, every column is given its type while reading (see CSV_DTYPES),
+    and "Begin Year" and "End Year" columns are added with the year each
+    disaster started and ended.
 
     Args:
         file_name: a string representing the name of the csv we use to generate
-        our pandas dataframe and ultimately our visualizations.
+        our pandas dataframe and ultimately our visualizations. An open file
+        object works as well.
 
     Returns: the pandas dataframe created from the file.
     """
-    return pd.read_csv(
-        file_name,
-        header=0,
-        names=[
-            "Name",
-            "Disaster",
-            "Begin Date",
-            "End Date",
-            "Total CPI-Adjusted Cost (Millions of Dollars)",
-            "Deaths",
-        ],
-    ).drop([0])
+    dataframe = pd.read_csv(file_name, **CSV_READ_OPTIONS)
+    add_year_columns(dataframe)
+    return dataframe
 
 
 # these functions help us replace the unwieldy eight-character date format with
@@ -54,6 +87,21 @@ def parse_year(date):
     return date[0:4]
 
 
+def add_year_columns(dataframe):
+    """
+    Adds "Begin Year" and "End Year" columns to a dataframe, holding the year
+    of its Begin Date and End Date columns as 16-bit ints. Works with either
+    the eight-character dates or the four-character years.
+
+    Args:
+        dataframe: a dataframe to add the year columns to.
+    """
+    for col in ["Begin Date", "End Date"]:
+        dataframe[col.replace("Date", "Year")] = (
+            dataframe[col].astype(str).str[0:4].astype("int16")
+        )
+
+
 def parse_all_years(dataframe):
     """
     Reformats the Begin Date and End Date columns of a dataframe to a
@@ -63,8 +111,7 @@ def parse_all_years(dataframe):
         dataframe: a dataframe to reformat.
     """
     for col in ["Begin Date", "End Date"]:
-        for i, date in dataframe[col].items():
-            dataframe[col].iloc[i - 1] = parse_year(date)
+        dataframe[col] = dataframe[col].astype(str).str[0:4]
 
 
 # these functions will get us unique lists of the columns we will sort by
@@ -79,7 +126,7 @@ def retrieve_unique_disaster_types(dataframe):
 
     Returns: A list containing each unique disaster type (as a string).
     """
-    return dataframe["Disaster"].unique()
+    return np.asarray(dataframe["Disaster"].unique())
 
 
 def retrieve_unique_years(dataframe):
@@ -105,8 +152,138 @@ def retrieve_unique_years(dataframe):
     return unique_years
 
 
+# keyword sets that the geo locator searches disaster names for, one set per
+# region of the U.S. (as divided in the census)
+SOUTH_KEYWORDS = (
+    "South ",
+    "Southern",
+    "Southeast",
+    "Southwest",
+    "Florida",
+    "Gulf ",
+    "Virginia",
+    "Texas",
+    "Mississippi",
+    "Georgia",
+    "Houston",
+    "Louisiana",
+    "Arkansas",
+    "Tennessee",
+    "Kentucky",
+    "Fort Lauderdale",
+    "Oklahoma",
+    "Virginia",
+    "Mid-Atlantic",
+    "Allen",
+    "Alicia",
+    "Elena",
+    "Allison",
+    "Hugo",
+    "Andrew",
+    "Alberto",
+    "Erin",
+    "Opal",
+    "Fran",
+    "Frances",
+    "Bonnie",
+    "Georges",
+    "Floyd",
+    "Lili",
+    "Isidore",
+    "Isabel",
+    "Charley",
+    "Ivan",
+    "Jeanne",
+    "Dennis",
+    "Katrina",
+    "Rita",
+    "Wilma",
+    "Dolly",
+    "Gustav",
+    "Ike",
+    "Lee",
+    "Isaac",
+    "Matthew",
+    "Harvey",
+    "Irma",
+    "Maria",
+    "Florence",
+    "Michael",
+    "Dorian",
+    "Imelda",
+    "Hanna",
+    "Isaias",
+    "Laura",
+    "Sally",
+    "Delta",
+    "Zeta",
+    "Eta",
+    "Elsa",
+    "Fred",
+    "Hurricane Ida",
+    "Nicholas",
+    "Fiona",
+    "Hurricane Ian",
+    "Nicole",
+    "Idalia",
+)
+WEST_KEYWORDS = (
+    "West ",
+    "Western",
+    "Northwest",
+    "Colorado",
+    "California",
+    "Oakland",
+    "Rockies",
+    "Arizona",
+    "Alaska",
+    "Hawaii",
+    "Iniki",
+)
+MIDWEST_KEYWORDS = (
+    "Midwest",
+    "Central",
+    "Plains",
+    "Kansas",
+    "Missouri",
+    "Illinois",
+    "Michigan",
+    "Minnesota",
+)
+NORTHEAST_KEYWORDS = (
+    "Northeast",
+    "New England",
+    "Bob",
+    "Irene",
+    "Sandy",
+)
+REGION_KEYWORDS = {
+    "Southern": SOUTH_KEYWORDS,
+    "Western": WEST_KEYWORDS,
+    "Midwestern": MIDWEST_KEYWORDS,
+    "Northeastern": NORTHEAST_KEYWORDS,
+}
+# These two disasters both had names that the keyword sets could not parse
+# effectively, but are clear to a human reader that they belong in the south.
+SOUTHERN_OVERRIDES = (
+    "North/Central Texas Hail Storm (April 2016)",
+    "North Texas Hail Storm (March 2016)",
+)
+# every label the geo locator can hand back, in the order of REGION_KEYWORDS
+REGION_CATEGORIES = [*REGION_KEYWORDS, "empty"]
+# a short fingerprint of the keyword sets and overrides above; anything that
+# remembers the geo locator's answers outside of this process should be keyed
+# by it, so that editing the keywords makes those answers stale
+KEYWORD_FINGERPRINT = hashlib.sha256(
+    json.dumps([REGION_KEYWORDS, SOUTHERN_OVERRIDES]).encode()
+).hexdigest()[:16]
+# how many distinct names the geo locator remembers its answers for
+GEO_LOCATOR_CACHE_SIZE = 4096
+
+
 # function that takes a disaster name and index and returns the region
 # destination
+@functools.lru_cache(maxsize=GEO_LOCATOR_CACHE_SIZE)
 def geo_locator(disaster_name):
     """
     Given the name of a disaster, parses the name for indicators corresponding
@@ -116,7 +293,9 @@ def geo_locator(disaster_name):
     to fit disasters to regions where they make sense. If a disaster's name
     matched with multiple regions or had names that were ambiguous and did not
     match with a particular region, that row of data would go unused in
-    visualizations (indicated by returning "empty").
+    visualizations (indicated by returning "empty"). Answers for the most
+    recently seen names are remembered, so repeated names are not parsed
+    again.
 
     Args:
         disaster_name: a string containing the Name column of the pandas
@@ -127,142 +306,158 @@ def geo_locator(disaster_name):
     could not be determined.
     """
     disaster_location = []
-    south_set = [
-        "South ",
-        "Southern",
-        "Southeast",
-        "Southwest",
-        "Florida",
-        "Gulf ",
-        "Virginia",
-        "Texas",
-        "Mississippi",
-        "Georgia",
-        "Houston",
-        "Louisiana",
-        "Arkansas",
-        "Tennessee",
-        "Kentucky",
-        "Fort Lauderdale",
-        "Oklahoma",
-        "Virginia",
-        "Mid-Atlantic",
-        "Allen",
-        "Alicia",
-        "Elena",
-        "Allison",
-        "Hugo",
-        "Andrew",
-        "Alberto",
-        "Erin",
-        "Opal",
-        "Fran",
-        "Frances",
-        "Bonnie",
-        "Georges",
-        "Floyd",
-        "Lili",
-        "Isidore",
-        "Isabel",
-        "Charley",
-        "Ivan",
-        "Jeanne",
-        "Dennis",
-        "Katrina",
-        "Rita",
-        "Wilma",
-        "Dolly",
-        "Gustav",
-        "Ike",
-        "Lee",
-        "Isaac",
-        "Matthew",
-        "Harvey",
-        "Irma",
-        "Maria",
-        "Florence",
-        "Michael",
-        "Dorian",
-        "Imelda",
-        "Hanna",
-        "Isaias",
-        "Laura",
-        "Sally",
-        "Delta",
-        "Zeta",
-        "Eta",
-        "Elsa",
-        "Fred",
-        "Hurricane Ida",
-        "Nicholas",
-        "Fiona",
-        "Hurricane Ian",
-        "Nicole",
-        "Idalia",
-    ]
-    west_set = [
-        "West ",
-        "Western",
-        "Northwest",
-        "Colorado",
-        "California",
-        "Oakland",
-        "Rockies",
-        "Arizona",
-        "Alaska",
-        "Hawaii",
-        "Iniki",
-    ]
-    midwest_set = [
-        "Midwest",
-        "Central",
-        "Plains",
-        "Kansas",
-        "Missouri",
-        "Illinois",
-        "Michigan",
-        "Minnesota",
-    ]
-    northeast_set = [
-        "Northeast",
-        "New England",
-        "Bob",
-        "Irene",
-        "Sandy",
-    ]
-
-    for s_key in south_set:
-        if s_key in disaster_name:
+    for region_name, keywords in REGION_KEYWORDS.items():
+        for key in keywords:
+            if key in disaster_name:
+                disaster_location.append(region_name)
+                break
+
+    for override in SOUTHERN_OVERRIDES:
+        if override in disaster_name:
+            disaster_location.clear()
             disaster_location.append("Southern")
-            break
-    for w_key in west_set:
-        if w_key in disaster_name:
-            disaster_location.append("Western")
-            break
-    for m_key in midwest_set:
-        if m_key in disaster_name:
-            disaster_location.append("Midwestern")
-            break
-    for n_key in northeast_set:
-        if n_key in disaster_name:
-            disaster_location.append("Northeastern")
-            break
-
-    if (
-        # These two disasters both had names that the function could not parse
-        # effectively, but are clear to a human reader that they belong in the
-        # south.
-        "North/Central Texas Hail Storm (April 2016)" in disaster_name
-        or "North Texas Hail Storm (March 2016)" in disaster_name
-    ):
-        disaster_location.clear()
-        disaster_location.append("Southern")
 
     if len(disaster_location) == 1:
         return disaster_location[0]
     return "empty"
 
 
+# the keyword sets compiled into one alternation per region, so a whole column
+# of names can be searched without a Python loop over the keywords
+_REGION_PATTERNS = [
+    re.compile("|".join(re.escape(key) for key in keywords))
+    for keywords in REGION_KEYWORDS.values()
+]
+_OVERRIDE_PATTERN = re.compile(
+    "|".join(re.escape(override) for override in SOUTHERN_OVERRIDES)
+)
+
+
+def locate_all_regions(name_column, region_table=None):
+    """
+    Vectorized version of the geo locator function. Given a column of disaster
+    names, label every name with its region in one pass. Each distinct name is
+    only classified once, so names that repeat across the column cost nothing
+    extra.
+
+    Args:
+        name_column: a pandas series containing the Name column of the
+        pandas dataframe.
+        region_table: an optional dictionary mapping names to the regions
+        they were already found to be in. Names in it are not classified
+        again, and the names classified by this call are added to it.
+
+    Returns: A categorical series named "Region" with the same index as
+    name_column, holding exactly what the geo locator function would return
+    for each name.
+    """
+    name_column = pd.Series(name_column, dtype=object)
+    name_codes, unique_names = pd.factorize(name_column)
+    unique_names = pd.Series(unique_names, dtype=object)
+
+    if region_table is None:
+        region_codes = classify_names(unique_names)
+    else:
+        known = pd.Index(REGION_CATEGORIES).get_indexer(
+            unique_names.map(region_table)
+        )
+        unknown = known < 0
+        new_codes = classify_names(unique_names[unknown])
+        known[unknown] = new_codes
+        region_table.update(
+            zip(
+                unique_names[unknown],
+                np.asarray(REGION_CATEGORIES, dtype=object)[new_codes],
+            )
+        )
+        region_codes = known
+
+    # missing names are factorized to -1, which picks up this trailing "empty"
+    region_codes = np.append(region_codes, REGION_CATEGORIES.index("empty"))
+    return pd.Series(
+        pd.Categorical.from_codes(
+            region_codes[name_codes], categories=REGION_CATEGORIES
+        ),
+        index=name_column.index,
+        name="Region",
+    )
+
+
+def classify_names(unique_names):
+    """
+    Does the work of the vectorized region locator for a series of names.
+
+    Args:
+        unique_names: a pandas series of disaster names (as objects).
+
+    Returns: A numpy array with one int per name, the position of its region
+    in REGION_CATEGORIES.
+    """
+    matched = region_matches(unique_names)
+    return np.where(
+        matched.sum(axis=1) == 1,
+        matched.argmax(axis=1),
+        REGION_CATEGORIES.index("empty"),
+    )
+
+
+def region_matches(unique_names):
+    """
+    Finds every region whose keywords appear in each of a series of names.
+    Names containing one of the southern overrides only match "Southern".
+
+    Args:
+        unique_names: a pandas series of disaster names (as objects).
+
+    Returns: A numpy array of booleans with one row per name and one column
+    per region, in the order of REGION_KEYWORDS.
+    """
+    # one column of matches per region, one row per name
+    matched = np.zeros((len(unique_names), len(_REGION_PATTERNS)), dtype=bool)
+    for i, pattern in enumerate(_REGION_PATTERNS):
+        matched[:, i] = unique_names.str.contains(pattern, na=False)
+    overridden = unique_names.str.contains(
+        _OVERRIDE_PATTERN, na=False
+    ).to_numpy(dtype=bool)
+    matched[overridden] = False
+    matched[overridden, REGION_CATEGORIES.index("Southern")] = True
+    return matched
+
+
+def partition_regions(dataframe, region_list):
+    """
+    Given a dataframe and a list of U.S. regions, split the dataframe into one
+    dataframe per region in a single pass. Every disaster name is classified
+    once by the vectorized region locator, then the rows are grouped by their
+    region, so the work grows linearly with the number of rows.
+
+    Args:
+        dataframe: a dataframe containing a list of disasters and their
+        regional designations.
+        region_list: a list of strings representing the names of U.S. regions.
+
+    Returns: A dictionary in which the keys are the names in region_list and
+    the values are dataframes with the natural disasters that affected each
+    region, indexed from zero. Regions with no disasters get an empty
+    dataframe with the same columns. If the dataframe already has a "Region"
+    column (as cached datasets do), it is used instead of classifying again.
+    """
+    if "Region" in dataframe:
+        regions = dataframe["Region"]
+    else:
+        regions = locate_all_regions(dataframe["Name"])
+    positions = regions.groupby(regions, observed=True).indices
+    no_rows = np.array([], dtype=np.intp)
+    return {
+        region_name: (
+            dataframe.iloc[positions.get(region_name, no_rows)].reset_index(
+                drop=True
+            )
+        )
+        for region_name in region_list
+    }
+
+
 def fill_one_region(dataframe, region_name):
     """
     Given a dataframe and the name of a region of the U.S., return a dataframe
@@ -278,28 +473,15 @@ def fill_one_region(dataframe, region_name):
     Returns: A dataframe with all of the natural disasters that have affected
     the region.
     """
-    region_df = pd.DataFrame(
-        columns=[
-            "Name",
-            "Disaster",
-            "Begin Date",
-            "End Date",
-            "Total CPI-Adjusted Cost (Millions of Dollars)",
-            "Deaths",
-        ]
-    )
-    for _, row in dataframe.iterrows():
-        if geo_locator(row["Name"]) == region_name:
-            region_df.loc[len(region_df)] = row
-    return region_df
+    return partition_regions(dataframe, [region_name])[region_name]
 
 
 def fill_all_regions(dataframe, region_list):
     """
     Given a dataframe and the list of U.S. regions described in the geo locator
-    function, call the fill_one_region function and return a list with one
-    dataframe per region (four total) that contains all of the natural
-    disasters that have affected the region.
+    function, return a list with one dataframe per region (four total) that
+    contains all of the natural disasters that have affected the region. The
+    dataframe is only scanned once, no matter how many regions are requested.
 
     Args:
         dataframe: a dataframe containing a list of disasters and their
@@ -310,10 +492,7 @@ def fill_all_regions(dataframe, region_list):
     Returns: A list of dataframes by region with the natural disasters that
     affected each region.
     """
-    df_list = {}
-    for region_name in region_list:
-        df_list[region_name] = fill_one_region(dataframe, region_name)
-    return df_list
+    return partition_regions(dataframe, region_list)
 
 
 # these split functions can be used to get yearly and disasterly dataframes
@@ -331,9 +510,12 @@ def generic_split_data(dataframe, split_by, child_group_set):
     Returns: A list of child dataframes that are each distinct from each
     other in some particular column.
     """
+    # one pass finds the rows of every group, rather than one pass per group
+    positions = dataframe.groupby(split_by, observed=True, sort=False).indices
+    no_rows = np.array([], dtype=np.intp)
     subframe_dict = {}
     for subframe_cat in child_group_set:
-        subframe = dataframe[dataframe[split_by] == subframe_cat]
+        subframe = dataframe.iloc[positions.get(subframe_cat, no_rows)]
         subframe_dict[subframe_cat] = subframe
     return subframe_dict
 
@@ -439,12 +621,9 @@ def sum_years_in_buckets(num_list, bucket_size):
     length of this list will be equal to the length of num_list divided by
     the bucket size.
     """
-    bucket_list = []
-    for _ in range(0, math.ceil(len(num_list) / bucket_size)):
-        bucket = sum(num_list[0 : min(bucket_size, len(num_list))])
-        bucket_list.append(bucket)
-        num_list = num_list[bucket_size : len(num_list)]
-    return bucket_list
+    return sum_in_buckets(
+        np.asarray(num_list), np.arange(0, len(num_list), bucket_size)
+    ).tolist()
 
 
 def assemble_one_disaster(dataframe, yrs, yr_buckets):
@@ -535,6 +714,207 @@ def assemble_region_data(dataframe, yrs, drs, yr_buckets):
     return organized_disasters_cost, organized_disasters_deaths
 
 
+# these functions aggregate every region at once: one groupby over all of the
+# disasters replaces splitting each region by disaster type and by year
+def tally_events(dataframe):
+    """
+    Given a dataframe of disasters with a "Region" column, sum the cost and
+    deaths of every region, disaster type, and starting year combination in a
+    single groupby. Only combinations that actually occur in the data are
+    listed.
+
+    Args:
+        dataframe: a dataframe containing disasters and their regions. Note:
+        this function assumes that the Begin Date column holds four-character
+        years, NOT the original eight-character dates.
+
+    Returns: A dataframe indexed by region, disaster type, and year (in that
+    order) with one "Cost" column and one "Deaths" column, both floats.
+    """
+    events = pd.DataFrame(
+        {
+            "Region": dataframe["Region"],
+            "Disaster": dataframe["Disaster"],
+            "Year": dataframe["Begin Date"],
+            "Cost": (
+                dataframe[
+                    "Total CPI-Adjusted Cost (Millions of Dollars)"
+                ].astype(float)
+            ),
+            "Deaths": dataframe["Deaths"].astype(float),
+        }
+    )
+    tally = events.groupby(
+        ["Region", "Disaster", "Year"], observed=True, sort=False
+    ).sum()
+    # plain labels, so tallies of different dataframes can be added together
+    tally.index = pd.MultiIndex.from_arrays(
+        [
+            tally.index.get_level_values(level).astype(object)
+            for level in range(tally.index.nlevels)
+        ],
+        names=tally.index.names,
+    )
+    return tally
+
+
+def tally_regions(region_dict):
+    """
+    Given a dictionary of region dataframes, sum the cost and deaths of every
+    region, disaster type, and starting year combination with the tally
+    events function.
+
+    Args:
+        region_dict: a dictionary in which the keys are the names of US regions
+        and the values are dataframes containing their unorganized values.
+
+    Returns: A dataframe indexed by region, disaster type, and year (in that
+    order) with one "Cost" column and one "Deaths" column, both floats.
+    """
+    frames = [
+        region_frame.assign(Region=region_name)
+        for region_name, region_frame in region_dict.items()
+        if len(region_frame) > 0
+    ]
+    if not frames:
+        return pd.DataFrame(
+            {"Cost": [], "Deaths": []},
+            index=pd.MultiIndex.from_arrays(
+                [[], [], []], names=["Region", "Disaster", "Year"]
+            ),
+        )
+    return tally_events(pd.concat(frames, ignore_index=True))
+
+
+def spread_tally(tally, region_list, yrs, drs):
+    """
+    Given the sums made by the tally regions function, lay them out in a
+    dense array with one cell for every region, disaster type, and year that
+    was asked for. Combinations missing from the tally are filled with zeroes,
+    and tally rows outside of the requested lists are left out.
+
+    Args:
+        tally: a dataframe made by the tally regions function.
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+
+    Returns: A numpy array of floats with the shape (2, regions, disasters,
+    years). The first entry along the first axis holds cost, the second holds
+    deaths.
+    """
+    spread = np.zeros((2, len(region_list), len(drs), len(yrs)))
+    positions = [
+        pd.Index(labels, dtype=object).get_indexer(
+            tally.index.get_level_values(level).astype(object)
+        )
+        for level, labels in zip(
+            ["Region", "Disaster", "Year"], [region_list, drs, yrs]
+        )
+    ]
+    wanted = np.logical_and.reduce([position >= 0 for position in positions])
+    wanted_positions = tuple(position[wanted] for position in positions)
+    spread[0][wanted_positions] = tally["Cost"].to_numpy()[wanted]
+    spread[1][wanted_positions] = tally["Deaths"].to_numpy()[wanted]
+    return spread
+
+
+def bucket_years(spread, bucket_size):
+    """
+    Sum the last (year) axis of an array into buckets of a given size. This is
+    the array version of the sum years in buckets function: if the year axis
+    has length 44 and the bucket size is 5, the new year axis has length 9,
+    the last bucket holding the four leftover years.
+
+    Args:
+        spread: a numpy array whose last axis runs over years.
+        bucket_size: the number of years to be summed per bucket.
+
+    Returns: A numpy array with the same shape as spread, except that the last
+    axis has one entry per bucket.
+    """
+    return sum_in_buckets(spread, np.arange(0, spread.shape[-1], bucket_size))
+
+
+def sum_in_buckets(spread, starts):
+    """
+    Sum the last axis of an array into buckets that can each have a different
+    size, all in one numpy call. Bucket i holds the entries from starts[i] up
+    to (but not including) starts[i + 1]; the last bucket runs to the end of
+    the axis. A bucket that starts where the next one starts is empty and sums
+    to zero.
+
+    Args:
+        spread: a numpy array whose last axis runs over years.
+        starts: a list of ints in increasing order, the position along the
+        last axis where each bucket starts. Entries before the first start
+        are left out.
+
+    Returns: A numpy array with the same shape as spread, except that the last
+    axis has one entry per bucket.
+    """
+    length = spread.shape[-1]
+    starts = np.asarray(starts, dtype=np.intp)
+    if length == 0 or len(starts) == 0:
+        return np.zeros((*spread.shape[:-1], len(starts)), dtype=spread.dtype)
+    ends = np.append(starts[1:], length)
+    summed = np.add.reduceat(spread, np.minimum(starts, length - 1), axis=-1)
+    summed[..., starts >= ends] = 0
+    return summed
+
+
+def year_buckets(yrs, buckets):
+    """
+    Works out how to group a list of years into buckets, and what to call
+    each bucket. The buckets can either all hold the same number of entries
+    of yrs (the last one holding what is left over), or start at given years.
+
+    Args:
+        yrs: a list containing all possible years in increasing order, as
+        strings or ints.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group (in increasing order). With a
+        list, years before the first group are left out and the last group
+        runs to the end of yrs.
+
+    Returns: Two lists: the position in yrs where each bucket starts (to be
+    handed to the sum in buckets function), and a label for each bucket such
+    as "1980 - 1984", or just "1980" for a bucket of one year.
+    """
+    if isinstance(buckets, (int, np.integer)):
+        starts = np.arange(0, len(yrs), buckets)
+        ends = np.append(starts[1:], len(yrs))[: len(starts)]
+        firsts = [yrs[start] for start in starts]
+        lasts = [yrs[end - 1] for end in ends]
+    else:
+        year_values = np.asarray(yrs, dtype=int)
+        edges = np.asarray(buckets, dtype=int)
+        starts = np.searchsorted(year_values, edges)
+        final_year = year_values[-1] if len(year_values) else edges[-1]
+        firsts = edges.tolist()
+        lasts = np.maximum(edges, np.append(edges[1:] - 1, final_year)).tolist()
+    labels = [
+        str(first) if str(first) == str(last) else f"{first} - {last}"
+        for first, last in zip(firsts, lasts)
+    ]
+    return starts.tolist(), labels
+
+
+def label_year_buckets(yrs, buckets):
+    """
+    Gives the labels of the buckets the organize regions function groups a
+    list of years into, to be used as the index of a plottable dataframe.
+
+    Args:
+        yrs: a list containing all possible years in increasing order.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group.
+
+    Returns: A list of strings such as "1980 - 1984", one per bucket.
+    """
+    return year_buckets(yrs, buckets)[1]
+
+
 def organize_regions(region_dict, yrs, drs, buckets):
     """
     Given a dataframe, a list with a range of years, a list of all disaster
@@ -553,6 +933,8 @@ def organize_regions(region_dict, yrs, drs, buckets):
         data.
         buckets: an int representing the number of years in one group. For
         example, if we were grouping by decade, this variable would be 10.
+        It can also be a list of the first year of each group, for groups of
+        different sizes (see the year buckets function).
 
     Returns: A list containing two dictionaries; one for cost and deaths
     respectively. Each is a dictionary in which the keys are the names of US
@@ -560,12 +942,352 @@ def organize_regions(region_dict, yrs, drs, buckets):
     types and the values are arrays containing information on sum damages
     (cost or deaths) of that disaster type for each year.
     """
+    return organize_tally(
+        tally_regions(region_dict), list(region_dict), yrs, drs, buckets
+    )
+
+
+def organize_tally(tally, region_list, yrs, drs, buckets):
+    """
+    Given the sums made by the tally regions or tally events function, return
+    them in the same plottable format as the organize regions function.
+
+    Args:
+        tally: a dataframe made by the tally regions or tally events function.
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group (see the year buckets function).
+
+    Returns: A list containing two dictionaries; one for cost and deaths
+    respectively, shaped like the ones returned by organize regions.
+    """
+    return organize_spread(
+        spread_tally(tally, region_list, yrs, drs),
+        region_list,
+        yrs,
+        drs,
+        buckets,
+    )
+
+
+def organize_spread(spread, region_list, yrs, drs, buckets):
+    """
+    Given an array of the cost and deaths of every region, disaster type, and
+    year, return them in the same plottable format as the organize regions
+    function.
+
+    Args:
+        spread: a numpy array of floats with the shape (2, regions,
+        disasters, years), like the one made by the spread tally function.
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group (see the year buckets function).
+
+    Returns: A list containing two dictionaries; one for cost and deaths
+    respectively, shaped like the ones returned by organize regions.
+    """
+    starts, _ = year_buckets(yrs, buckets)
+    spread = sum_in_buckets(spread, starts)
     regions_sorted_cost = {}
     regions_sorted_deaths = {}
-    for region_name, region_frame in region_dict.items():
-        region_as_cost, region_as_deaths = assemble_region_data(
-            region_frame, yrs, drs, buckets
+    for i, region_name in enumerate(region_list):
+        regions_sorted_cost[region_name] = dict(zip(drs, spread[0, i].tolist()))
+        regions_sorted_deaths[region_name] = dict(
+            zip(drs, spread[1, i].tolist())
         )
-        regions_sorted_cost[region_name] = region_as_cost
-        regions_sorted_deaths[region_name] = region_as_deaths
     return regions_sorted_cost, regions_sorted_deaths
+
+
+# these functions look at the per-year sums over time, for every region and
+# disaster type at once; they take the unbucketed array made by spread_tally
+# (or a RegionCube's values) and the calendar years along its last axis
+def calendar_years(spread, yrs):
+    """
+    Lays the per-year sums out on every calendar year from the first year to
+    the last, so that years with no disasters (which are missing from yrs)
+    count as zero instead of being skipped over.
+
+    Args:
+        spread: a numpy array whose last axis holds one entry per year of
+        yrs.
+        yrs: a list of the years (as strings or ints) in increasing order.
+
+    Returns: The array with one entry per calendar year along its last
+    axis, and a numpy array with the position of each year of yrs in it.
+    """
+    years = np.asarray([int(year) for year in yrs], dtype=int)
+    span = years[-1] - years[0] + 1 if len(years) else 0
+    positions = years - years[0] if len(years) else years
+    full = np.zeros((*spread.shape[:-1], span))
+    full[..., positions] = spread
+    return full, positions
+
+
+def rolling_sum(spread, yrs, window):
+    """
+    Gives the moving sum over the last window calendar years, ending at each
+    year of yrs. Years near the start, with fewer than window years before
+    them, hold the sum of the years so far.
+
+    Args:
+        spread: a numpy array whose last axis holds one entry per year of
+        yrs, like the one made by spread_tally.
+        yrs: a list of the years (as strings or ints) in increasing order.
+        window: an int representing the number of years to sum over.
+
+    Returns: A numpy array of floats with the same shape as spread.
+    """
+    full, positions = calendar_years(spread, yrs)
+    totals = np.cumsum(full, axis=-1)
+    totals = np.concatenate(
+        [np.zeros((*totals.shape[:-1], 1)), totals], axis=-1
+    )
+    return (
+        totals[..., positions + 1]
+        - totals[..., np.maximum(positions + 1 - window, 0)]
+    )
+
+
+def cumulative_sum(spread):
+    """
+    Gives the running total of every year and all of the years before it.
+
+    Args:
+        spread: a numpy array whose last axis holds one entry per year, like
+        the one made by spread_tally.
+
+    Returns: A numpy array of floats with the same shape as spread.
+    """
+    return np.cumsum(spread, axis=-1, dtype=float)
+
+
+def year_over_year(spread, yrs):
+    """
+    Gives the growth of every year over the calendar year before it, as a
+    fraction (0.5 means 50% more than the year before). The growth is NaN for
+    the first year and whenever the year before had no damages.
+
+    Args:
+        spread: a numpy array whose last axis holds one entry per year of
+        yrs, like the one made by spread_tally.
+        yrs: a list of the years (as strings or ints) in increasing order.
+
+    Returns: A numpy array of floats with the same shape as spread.
+    """
+    full, positions = calendar_years(spread, yrs)
+    previous = np.concatenate(
+        [np.zeros((*full.shape[:-1], 1)), full[..., :-1]], axis=-1
+    )[..., positions]
+    current = full[..., positions]
+    return np.divide(
+        current - previous,
+        previous,
+        out=np.full(current.shape, np.nan),
+        where=previous != 0,
+    )
+
+
+# these functions split events whose names match several regions between all
+# of them, instead of dropping them like the geo locator does
+def attribution_weights(name_column, weights=None):
+    """
+    Works out what share of each disaster goes to each region it matched.
+    A disaster matching one region goes entirely to it, as with the geo
+    locator; a disaster matching several is shared between them, equally or
+    in proportion to weights. Disasters matching no region get no shares.
+
+    The shares form a sparse matrix with one row per disaster and one column
+    per region, returned in coordinate form (one entry per nonzero share).
+
+    Args:
+        name_column: a pandas series containing the Name column of the
+        pandas dataframe.
+        weights: an optional dictionary mapping region names to how much of
+        a shared disaster they should get relative to each other (for
+        example, their areas). Regions left out get nothing from shared
+        disasters. By default, every matched region gets an equal share.
+
+    Returns: Three numpy arrays of the same length: the position of the
+    disaster in name_column, the position of the region in REGION_CATEGORIES,
+    and the share of the disaster that region gets. The shares of each
+    disaster add up to 1.
+    """
+    name_codes, unique_names = pd.factorize(
+        pd.Series(name_column, dtype=object)
+    )
+    matched = region_matches(pd.Series(unique_names, dtype=object))
+    region_weights = np.array(
+        [
+            1.0 if weights is None else float(weights.get(region_name, 0.0))
+            for region_name in REGION_KEYWORDS
+        ]
+    )
+    # a region matched alone keeps the whole disaster, whatever its weight
+    only_match = matched.sum(axis=1, keepdims=True) == 1
+    name_shares = np.where(only_match, matched, matched * region_weights)
+    totals = name_shares.sum(axis=1, keepdims=True)
+    name_shares = np.divide(
+        name_shares,
+        totals,
+        out=np.zeros_like(name_shares),
+        where=totals > 0,
+    )
+    # missing names are factorized to -1, which picks up this trailing row
+    name_shares = np.vstack([name_shares, np.zeros(len(REGION_KEYWORDS))])
+    events, regions = np.nonzero(name_shares[name_codes])
+    return events, regions, name_shares[name_codes[events], regions]
+
+
+def attribute_regions(dataframe, region_list, yrs, drs, weights=None):
+    """
+    Sums the cost and deaths of every region, disaster type, and year, with
+    disasters that match several regions shared between them (see the
+    attribution weights function). The sums are one weighted count over the
+    nonzero shares, the same as multiplying the matrix of shares by the
+    cost and deaths of each disaster.
+
+    Args:
+        dataframe: a dataframe of disasters. Note: this function assumes that
+        the Begin Date column holds four-character years, NOT the original
+        eight-character dates.
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        weights: an optional dictionary mapping region names to their
+        relative shares of disasters that match several regions.
+
+    Returns: A numpy array of floats with the shape (2, regions, disasters,
+    years), like the one made by the spread tally function.
+    """
+    events, regions, shares = attribution_weights(dataframe["Name"], weights)
+    region_positions = pd.Index(region_list).get_indexer(
+        np.asarray(REGION_CATEGORIES, dtype=object)[regions]
+    )
+    disaster_positions = pd.Index(drs).get_indexer(
+        dataframe["Disaster"].to_numpy()
+    )[events]
+    year_positions = pd.Index(yrs).get_indexer(
+        dataframe["Begin Date"].to_numpy()
+    )[events]
+    keep = (
+        (region_positions >= 0)
+        & (disaster_positions >= 0)
+        & (year_positions >= 0)
+    )
+    shape = (len(region_list), len(drs), len(yrs))
+    cells = np.ravel_multi_index(
+        (
+            region_positions[keep],
+            disaster_positions[keep],
+            year_positions[keep],
+        ),
+        shape,
+    )
+    spread = np.zeros((2, *shape))
+    for m, column in enumerate(
+        ["Total CPI-Adjusted Cost (Millions of Dollars)", "Deaths"]
+    ):
+        values = dataframe[column].to_numpy(dtype=float)[events[keep]]
+        spread[m] = np.bincount(
+            cells, weights=values * shares[keep], minlength=int(np.prod(shape))
+        ).reshape(shape)
+    return spread
+
+
+def organize_attributed(
+    dataframe, region_list, yrs, drs, buckets, weights=None
+):
+    """
+    Gives the same plottable dictionaries as the organize regions function,
+    except that disasters matching several regions are shared between them
+    instead of being left out.
+
+    Args:
+        dataframe: a dataframe of disasters, with four-character years in
+        the Begin Date column.
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group (see the year buckets function).
+        weights: an optional dictionary mapping region names to their
+        relative shares of disasters that match several regions.
+
+    Returns: A list containing two dictionaries; one for cost and deaths
+    respectively, shaped like the ones returned by organize regions.
+    """
+    return organize_spread(
+        attribute_regions(dataframe, region_list, yrs, drs, weights),
+        region_list,
+        yrs,
+        drs,
+        buckets,
+    )
+
+
+# this function runs the whole pipeline on a csv too large to load at once
+def organize_csv_in_chunks(
+    file_name,
+    region_list,
+    yrs=None,
+    drs=None,
+    buckets=1,
+    chunk_rows=CHUNK_ROWS,
+    region_table=None,
+):
+    """
+    Gives the same result as running read_csv_to_var, parse_all_years,
+    fill_all_regions, and organize_regions on a csv, without ever holding the
+    whole csv in memory. The csv is read chunk_rows rows at a time; each chunk
+    is given regions and summed per region, disaster type, and year, and only
+    those sums are kept. Memory use grows with chunk_rows and the number of
+    region, disaster type, and year combinations, not with the size of the
+    file, unless a region_table is given.
+
+    Args:
+        file_name: a string representing the path of the csv, or an open file
+        object.
+        region_list: a list of strings representing the names of US regions.
+        yrs: an optional list containing all possible years. By default,
+        every starting year in the file, in ascending order.
+        drs: an optional list containing all possible disasters. By default,
+        every disaster type in the file, in the order they first appear (as
+        retrieve_unique_disaster_types gives them).
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group (see the year buckets function).
+        chunk_rows: an int representing how many rows to read at a time.
+        region_table: an optional dictionary mapping names to their regions,
+        as used by locate_all_regions. If given, a name that repeats across
+        chunks is only classified once, but the table keeps every distinct
+        name in the file. By default each chunk is classified on its own,
+        with repeated names within a chunk still classified once.
+
+    Returns: A list containing two dictionaries; one for cost and deaths
+    respectively, shaped like the ones returned by organize regions.
+    """
+    tally = None
+    disasters_seen = {}
+    with pd.read_csv(
+        file_name, chunksize=chunk_rows, **CSV_READ_OPTIONS
+    ) as chunks:
+        for chunk in chunks:
+            parse_all_years(chunk)
+            chunk["Region"] = locate_all_regions(chunk["Name"], region_table)
+            disasters_seen.update(dict.fromkeys(chunk["Disaster"].unique()))
+            chunk_tally = tally_events(chunk)
+            tally = (
+                chunk_tally
+                if tally is None
+                else tally.add(chunk_tally, fill_value=0)
+            )
+    if tally is None:
+        tally = tally_regions({})
+    if yrs is None:
+        yrs = sorted(tally.index.unique("Year"))
+    if drs is None:
+        drs = list(disasters_seen)
+    return organize_tally(tally, region_list, yrs, drs, buckets)
@@ -0,0 +1,219 @@
+"""
+This file contains opt-in instrumentation for finding out which part of the
+pipeline (fetching, parsing, region classification, aggregation, or plotting)
+is slow.
+
+Inside a `with profiling() as profile:` block, every function of
+fetch_data.py, process_data.py, and graph_data.py is swapped for a wrapper
+that records how long each call took, how many rows it was handed, and
+(optionally) how much memory it allocated. When the block ends the original
+functions are put back, so outside of a profiling block the code runs exactly
+as if this file did not exist. For example:
+
+    with profiling() as profile:
+        dataframe = process_data.read_csv_to_var(DATASET_PATH)
+        ...
+    print(profile.summary())
+
+Calls are found by replacing the functions on their modules, so calls made
+through the module (process_data.read_csv_to_var(...)) and calls between
+functions of the same module are recorded, but functions another file
+imported by name before the block started (from process_data import ...) are
+not.
+
+This file uses six imports to help profile the code: contextlib, functools,
+json, time, tracemalloc, and pandas.
+time and tracemalloc are used to measure the time and memory of each call.
+contextlib and functools are used to swap the functions in and out.
+pandas is used to count rows and to lay out the summary table.
+json is used by the sink that writes every call to a file.
+"""
+
+import contextlib
+import functools
+import json
+import time
+import tracemalloc
+
+from lazy_import import lazy_import
+import fetch_data
+import graph_data
+import process_data
+
+pd = lazy_import("pandas")
+
+
+# the modules whose functions are profiled unless others are given
+DEFAULT_MODULES = (fetch_data, process_data, graph_data)
+
+
+def count_rows(args):
+    """
+    Counts the rows of data a function was handed, by adding up the lengths
+    of its dataframe and series arguments and of the dataframes in any
+    dictionary argument (like the region dictionaries).
+
+    Args:
+        args: a tuple of the positional arguments of a call.
+
+    Returns: An int representing the number of rows, or None if no argument
+    holds rows.
+    """
+    rows = None
+    for arg in args:
+        frames = arg.values() if isinstance(arg, dict) else (arg,)
+        for frame in frames:
+            if isinstance(frame, (pd.DataFrame, pd.Series)):
+                rows = (rows or 0) + len(frame)
+    return rows
+
+
+def json_lines_sink(file):
+    """
+    Makes a sink that writes each recorded call to a file as one line of
+    JSON.
+
+    Args:
+        file: a text file object opened for writing.
+
+    Returns: A function that takes a record dictionary and writes it out.
+    """
+
+    def sink(record):
+        file.write(json.dumps(record) + "\n")
+
+    return sink
+
+
+class Profile:
+    """
+    The calls recorded during one profiling block.
+
+    Attributes:
+        records: a list of dictionaries, one per call, with the function's
+        name, the seconds it took (including the functions it called), the
+        seconds spent in the function itself, the rows it was handed, and the
+        bytes of memory it allocated (None when memory is not traced).
+        sinks: a list of functions that are handed each record as it is made.
+    """
+
+    def __init__(self, sinks=()):
+        """
+        Starts an empty profile.
+
+        Args:
+            sinks: a list of functions that take a record dictionary.
+        """
+        self.records = []
+        self.sinks = list(sinks)
+        self._stack = []
+
+    def wrap(self, function, name):
+        """
+        Wraps a function so that every call to it is recorded.
+
+        Args:
+            function: the function to wrap.
+            name: a string representing the name to record the calls under.
+
+        Returns: The wrapped function.
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            memory_before = (
+                tracemalloc.get_traced_memory()[0]
+                if tracemalloc.is_tracing()
+                else None
+            )
+            # time spent in functions this call makes is added here, so that
+            # it can be taken off this call's own time
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                inner_seconds = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += seconds
+                record = {
+                    "function": name,
+                    "seconds": seconds,
+                    "own_seconds": seconds - inner_seconds,
+                    "rows": count_rows(args),
+                    "memory_bytes": (
+                        tracemalloc.get_traced_memory()[0] - memory_before
+                        if memory_before is not None
+                        else None
+                    ),
+                }
+                self.records.append(record)
+                for sink in self.sinks:
+                    sink(record)
+
+        # functions cached with functools.lru_cache (like the geo locator)
+        # keep their cache controls, which wraps does not copy over
+        for attribute in ("cache_info", "cache_clear"):
+            if hasattr(function, attribute):
+                setattr(wrapper, attribute, getattr(function, attribute))
+        return wrapper
+
+    def summary(self):
+        """
+        Adds up the recorded calls per function.
+
+        Returns: A pandas dataframe indexed by function name, with the number
+        of calls, the total and own seconds, the total rows, and the total
+        memory allocated, sorted so that the function with the most own time
+        comes first.
+        """
+        columns = ["seconds", "own_seconds", "rows", "memory_bytes"]
+        records = pd.DataFrame(self.records, columns=["function"] + columns)
+        grouped = records.groupby("function")
+        table = grouped[columns].sum(min_count=1)
+        table.insert(0, "calls", grouped.size())
+        return table.sort_values("own_seconds", ascending=False)
+
+
+@contextlib.contextmanager
+def profiling(modules=DEFAULT_MODULES, sinks=(), memory=False):
+    """
+    Records every call to the functions of some modules while the with block
+    runs, and puts the original functions back when it ends. This can also
+    be used as a decorator, in which case pass sinks to see the results.
+
+    Args:
+        modules: a list of modules whose functions to profile.
+        sinks: a list of functions that are handed each record dictionary as
+        it is made (see json_lines_sink).
+        memory: a boolean. If True, the memory each call allocates is traced
+        as well, which makes every call much slower.
+
+    Returns: A context manager giving the Profile the calls are recorded in.
+    """
+    profile = Profile(sinks)
+    originals = []
+    for module in modules:
+        for attribute, value in list(vars(module).items()):
+            if (
+                callable(value)
+                and not isinstance(value, type)
+                and getattr(value, "__module__", None) == module.__name__
+            ):
+                originals.append((module, attribute, value))
+                setattr(
+                    module,
+                    attribute,
+                    profile.wrap(value, f"{module.__name__}.{attribute}"),
+                )
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield profile
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        for module, attribute, value in originals:
+            setattr(module, attribute, value)
@@ -0,0 +1,234 @@
+"""
+This file contains a lazy query over the disaster dataset, for answering a
+single question (like "total Southern drought deaths from 2000 to 2010")
+without organizing the whole dataset by region, disaster type, and year.
+
+A DisasterQuery only records the filters it is given; nothing is read or
+computed until total() is called. It then applies the filters in the cheapest
+order and sums one column once. Queries over a cached Parquet file (see
+cache_data.py) push the filters and the column they need down into the file
+reader, so only the matching rows of that one column are ever read. For
+example:
+
+    query = DisasterQuery.from_csv(DATASET_PATH)
+    southern_droughts = query.regions("Southern").disasters("Drought")
+    deaths = southern_droughts.years(2000, 2010).total("deaths")
+
+This file uses two imports to help query the data: pathlib and pandas.
+pandas is used to read the cached file and to filter and sum the rows.
+pathlib is used to tell a cached file apart from a dataframe.
+"""
+
+from pathlib import Path
+
+from lazy_import import lazy_import
+from cache_data import CACHE_DIR, dataset_cache_path, load_dataset
+from process_data import locate_all_regions
+
+pd = lazy_import("pandas")
+
+
+# the column of the dataset each measure is summed from
+MEASURE_COLUMNS = {
+    "cost": "Total CPI-Adjusted Cost (Millions of Dollars)",
+    "deaths": "Deaths",
+}
+
+
+class DisasterQuery:
+    """
+    A question about the dataset that is only answered when total() is
+    called. Every filter method returns a new query and leaves the one it was
+    called on unchanged, so a query can be reused as the base of others.
+
+    Attributes:
+        source: the dataframe (from read_csv_to_var) or the Path of the
+        cached Parquet file (from cache_data.py) that the query reads.
+        region_names: a tuple of the regions to keep, or None for all.
+        disaster_types: a tuple of the disaster types to keep, or None for
+        all.
+        year_range: a tuple of the first and last starting year to keep (both
+        included, either may be None), or None for all years.
+    """
+
+    def __init__(
+        self, source, region_names=None, disaster_types=None, year_range=None
+    ):
+        """
+        Builds a query over a dataframe or cached file.
+
+        Args:
+            source: a dataframe made by read_csv_to_var, or a string or Path
+            of a Parquet file made by cache_data.load_dataset.
+            region_names: an optional list of the regions to keep.
+            disaster_types: an optional list of the disaster types to keep.
+            year_range: an optional tuple of the first and last starting year
+            to keep.
+        """
+        self.source = (
+            source if isinstance(source, pd.DataFrame) else Path(source)
+        )
+        self.region_names = (
+            None if region_names is None else tuple(region_names)
+        )
+        self.disaster_types = (
+            None if disaster_types is None else tuple(disaster_types)
+        )
+        self.year_range = year_range
+
+    @classmethod
+    def from_csv(cls, file_name, cache_dir=CACHE_DIR):
+        """
+        Builds a query over the cached copy of a csv, making the cached copy
+        first if there is none yet.
+
+        Args:
+            file_name: a string representing the path of the csv.
+            cache_dir: a string representing the folder holding cached files.
+
+        Returns: A DisasterQuery with no filters.
+        """
+        path = dataset_cache_path(file_name, cache_dir)
+        if not path.exists():
+            load_dataset(file_name, cache_dir)
+        return cls(path)
+
+    def _with(self, **changes):
+        """
+        Copies the query with some of its filters changed.
+
+        Args:
+            changes: the new values of the attributes to change.
+
+        Returns: A new DisasterQuery.
+        """
+        settings = {
+            "region_names": self.region_names,
+            "disaster_types": self.disaster_types,
+            "year_range": self.year_range,
+        }
+        settings.update(changes)
+        return DisasterQuery(self.source, **settings)
+
+    def regions(self, *region_names):
+        """
+        Keeps only the disasters in some regions.
+
+        Args:
+            region_names: the names of the regions to keep.
+
+        Returns: A new DisasterQuery.
+        """
+        return self._with(region_names=region_names)
+
+    def disasters(self, *disaster_types):
+        """
+        Keeps only some types of disasters.
+
+        Args:
+            disaster_types: the disaster types to keep.
+
+        Returns: A new DisasterQuery.
+        """
+        return self._with(disaster_types=disaster_types)
+
+    def years(self, first=None, last=None):
+        """
+        Keeps only the disasters that started in a range of years.
+
+        Args:
+            first: an optional int representing the first year to keep.
+            last: an optional int representing the last year to keep (it is
+            kept too).
+
+        Returns: A new DisasterQuery.
+        """
+        return self._with(year_range=(first, last))
+
+    def filters(self):
+        """
+        Lists the filters of the query in the form the Parquet reader takes,
+        cheapest first.
+
+        Returns: A list of (column, operator, value) tuples.
+        """
+        filters = []
+        if self.year_range is not None:
+            first, last = self.year_range
+            if first is not None:
+                filters.append(("Begin Year", ">=", int(first)))
+            if last is not None:
+                filters.append(("Begin Year", "<=", int(last)))
+        if self.disaster_types is not None:
+            filters.append(("Disaster", "in", list(self.disaster_types)))
+        if self.region_names is not None:
+            filters.append(("Region", "in", list(self.region_names)))
+        return filters
+
+    def plan(self, measure):
+        """
+        Describes how the query would be answered, without answering it.
+
+        Args:
+            measure: "cost" or "deaths".
+
+        Returns: A dictionary with the source, the filters in the order they
+        are applied, the columns read, and whether the filters are pushed down
+        into the file reader.
+        """
+        filters = self.filters()
+        columns = [MEASURE_COLUMNS[measure]]
+        if isinstance(self.source, pd.DataFrame):
+            columns += [column for column, _, _ in filters]
+        return {
+            "source": (
+                "dataframe"
+                if isinstance(self.source, pd.DataFrame)
+                else str(self.source)
+            ),
+            "filters": filters,
+            "columns": list(dict.fromkeys(columns)),
+            "pushdown": not isinstance(self.source, pd.DataFrame),
+        }
+
+    def rows(self, measure):
+        """
+        Runs the filters of the query.
+
+        Args:
+            measure: "cost" or "deaths".
+
+        Returns: A pandas series of the measure for every matching disaster.
+        """
+        column = MEASURE_COLUMNS[measure]
+        if not isinstance(self.source, pd.DataFrame):
+            return pd.read_parquet(
+                self.source, columns=[column], filters=self.filters() or None
+            )[column]
+
+        dataframe = self.source
+        keep = pd.Series(True, index=dataframe.index)
+        for filter_column, operator, value in self.filters():
+            if filter_column == "Region" and "Region" not in dataframe:
+                # only the rows left by the cheaper filters are located
+                regions = locate_all_regions(dataframe["Name"][keep])
+                keep[keep] = regions.isin(value).to_numpy()
+            elif operator == ">=":
+                keep &= dataframe[filter_column] >= value
+            elif operator == "<=":
+                keep &= dataframe[filter_column] <= value
+            else:
+                keep &= dataframe[filter_column].isin(value)
+        return dataframe[column][keep]
+
+    def total(self, measure):
+        """
+        Answers the query.
+
+        Args:
+            measure: "cost" or "deaths".
+
+        Returns: A float with the sum of the measure over every matching
+        disaster.
+        """
+        return float(self.rows(measure).sum())
@@ -0,0 +1,178 @@
+"""
+This file contains code for processing many archived NCEI releases at once,
+to track how the estimates of past disasters were revised over time.
+
+Each release is extracted into its own folder, like 0209268/17.17, holding
+the events csv of that release. Every release is loaded, split into regions,
+and summed in its own worker process, so dozens of releases use all of the
+cores instead of being processed one after another. The workers only hand
+back their sums per region, disaster type, and year (a tally), which are
+small, and the results are organized and combined afterwards.
+
+This file uses four imports to help process the releases:
+concurrent.futures, os, pathlib, and pandas.
+concurrent.futures is used to run the releases in a pool of processes.
+os is used to find out how many cores there are.
+pathlib is used to find the release folders.
+pandas is used to combine the sums of every release into one table.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+from pathlib import Path
+
+from lazy_import import lazy_import
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    partition_regions,
+    tally_regions,
+    organize_tally,
+)
+
+pd = lazy_import("pandas")
+
+
+# the folder the archived releases are extracted into
+RELEASE_ROOT = "0209268"
+# where the events csv sits inside a release folder
+RELEASE_CSV_PATTERN = "data/0-data/events-US-*.csv"
+
+
+def release_sort_key(version):
+    """
+    Orders release versions like "17.9" and "17.17" by number rather than
+    alphabetically.
+
+    Args:
+        version: a string representing the version of a release.
+
+    Returns: A tuple that sorts in release order.
+    """
+    return tuple(
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in version.split(".")
+    )
+
+
+def discover_releases(root=RELEASE_ROOT):
+    """
+    Finds the events csv of every release extracted under a folder.
+
+    Args:
+        root: a string or Path representing the folder the releases are
+        extracted into, with one folder per version.
+
+    Returns: A dictionary in which the keys are the release versions, in
+    release order, and the values are the paths of their events csvs.
+    """
+    found = {}
+    for file_name in Path(root).glob(f"*/{RELEASE_CSV_PATTERN}"):
+        version = file_name.relative_to(root).parts[0]
+        found.setdefault(version, file_name)
+    return {
+        version: found[version]
+        for version in sorted(found, key=release_sort_key)
+    }
+
+
+def tally_release(file_name, region_list):
+    """
+    Loads the csv of one release, splits it into regions, and sums the cost
+    and deaths of every region, disaster type, and year. This is the work
+    done by each worker process.
+
+    Args:
+        file_name: a string or Path representing the path of the csv.
+        region_list: a list of strings representing the names of US regions.
+
+    Returns: A dataframe made by the tally regions function.
+    """
+    dataframe = read_csv_to_var(file_name)
+    parse_all_years(dataframe)
+    return tally_regions(partition_regions(dataframe, region_list))
+
+
+def tally_releases(releases, region_list, max_workers=None):
+    """
+    Sums the cost and deaths of every release in a pool of worker processes.
+
+    Args:
+        releases: a dictionary in which the keys are the release versions and
+        the values are the paths of their csvs, like the one returned by
+        discover_releases.
+        region_list: a list of strings representing the names of US regions.
+        max_workers: an optional int representing the most processes to run
+        at once. By default, one per core (and never more than one per
+        release).
+
+    Returns: A dataframe indexed by release, region, disaster type, and year
+    (in that order) with one "Cost" column and one "Deaths" column.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(releases)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        tallies = list(
+            executor.map(
+                tally_release,
+                releases.values(),
+                [region_list] * len(releases),
+            )
+        )
+    if not tallies:
+        return pd.DataFrame(
+            {"Cost": [], "Deaths": []},
+            index=pd.MultiIndex.from_arrays(
+                [[], [], [], []],
+                names=["Release", "Region", "Disaster", "Year"],
+            ),
+        )
+    return pd.concat(tallies, keys=list(releases), names=["Release"])
+
+
+def organize_releases(
+    releases, region_list, yrs=None, drs=None, buckets=1, max_workers=None
+):
+    """
+    Processes every release the way the notebook processes one, in a pool of
+    worker processes.
+
+    Args:
+        releases: a dictionary in which the keys are the release versions and
+        the values are the paths of their csvs, like the one returned by
+        discover_releases.
+        region_list: a list of strings representing the names of US regions.
+        yrs: an optional list containing all possible years. By default,
+        every starting year found in any release, so that the results of all
+        releases line up.
+        drs: an optional list containing all possible disasters. By default,
+        every disaster type found in any release.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group.
+        max_workers: an optional int representing the most processes to run
+        at once.
+
+    Returns: A dictionary in which the keys are the release versions and the
+    values are the cost and deaths dictionaries organize_regions would give
+    for that release.
+    """
+    tally = tally_releases(releases, region_list, max_workers)
+    if yrs is None:
+        yrs = sorted(tally.index.unique("Year"))
+    if drs is None:
+        drs = list(tally.index.unique("Disaster"))
+    return {
+        version: organize_tally(
+            (
+                tally.xs(version, level="Release")
+                if version in tally.index.unique("Release")
+                else tally.iloc[:0].droplevel("Release")
+            ),
+            region_list,
+            yrs,
+            drs,
+            buckets,
+        )
+        for version in releases
+    }
@@ -0,0 +1,226 @@
+"""
+This file contains a local store for the events of many NCEI releases, kept
+as plain numpy arrays on disk so they can be opened without being loaded.
+
+Each release gets its own folder in the store with one .npy file per column:
+cost (float64), deaths (int32), starting year (int16), region (int8 codes
+into REGION_CATEGORIES), disaster type (int8 codes into the release's list of
+disaster types), and name (int32 codes into a fixed-width array of the
+release's distinct names). The fingerprint of the region keywords and the
+list of region categories are stored next to them, so that a release whose
+regions were found with other keywords is not read as if they still
+applied. Opening a release memory-maps these files, so it
+takes no time no matter how large the release is, only the pages that are
+actually read are loaded, and worker processes reading the same release
+share those pages instead of each holding a copy.
+
+This file uses five imports to help store the data: json, os, pathlib,
+shutil, and numpy.
+numpy is used to write and memory-map the columns. They are encoded and
+summed by the functions of compact_data.py.
+json is used to store the list of disaster types of each release and the
+region keywords its regions were found with.
+os, shutil, and pathlib are used to lay out the store and to replace a
+release's folder in one step.
+"""
+
+import json
+import os
+from pathlib import Path
+import shutil
+
+from compact_data import EventTable, spread_columns
+from lazy_import import lazy_import
+from process_data import (
+    KEYWORD_FINGERPRINT,
+    REGION_CATEGORIES,
+    read_csv_to_var,
+    organize_spread,
+)
+from release_data import release_sort_key
+
+np = lazy_import("numpy")
+
+
+# the folder releases are stored in unless another one is given
+STORE_DIR = ".cache/store"
+# the columns of a stored release and the types they are stored as
+STORE_DTYPES = {
+    "cost": "float64",
+    "deaths": "int32",
+    "year": "int16",
+    "region": "int8",
+    "disaster": "int8",
+    "name": "int32",
+}
+
+
+def encode_release(dataframe):
+    """
+    Turns a loaded dataframe of disasters into the columns of the store, by
+    way of an EventTable (see compact_data.py).
+
+    Args:
+        dataframe: a dataframe made by read_csv_to_var. If it has no "Region"
+        column, regions are found with the vectorized region locator.
+
+    Returns: A dictionary of numpy arrays, one per entry of STORE_DTYPES plus
+    "names" (the distinct names, as a fixed-width string array), and a list
+    of the disaster types the "disaster" codes point into. Missing values
+    are given the code -1.
+    """
+    table = EventTable.from_frame(dataframe)
+    arrays = {
+        column: table.columns[column].astype(dtype)
+        for column, dtype in STORE_DTYPES.items()
+    }
+    arrays["names"] = np.asarray(list(table.names), dtype=str)
+    return arrays, table.disasters
+
+
+def write_release(dataframe, version, store_dir=STORE_DIR):
+    """
+    Writes the events of one release to the store, replacing any earlier
+    copy of that release. The columns are written to a temporary folder
+    first, so a release is never left half written.
+
+    Args:
+        dataframe: a dataframe made by read_csv_to_var.
+        version: a string representing the release version, like "17.17".
+        store_dir: a string or Path representing the folder of the store.
+
+    Returns: A Path to the folder the release was written to.
+    """
+    arrays, disasters = encode_release(dataframe)
+    path = Path(store_dir) / version
+    temp_path = Path(store_dir) / f".{version}.tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    temp_path.mkdir(parents=True)
+    for column, array in arrays.items():
+        np.save(temp_path / f"{column}.npy", array)
+    with open(temp_path / "disasters.json", "w", encoding="utf-8") as file:
+        json.dump(disasters, file)
+    with open(temp_path / "regions.json", "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "fingerprint": KEYWORD_FINGERPRINT,
+                "categories": REGION_CATEGORIES,
+            },
+            file,
+        )
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(temp_path, path)
+    return path
+
+
+def store_releases(releases, store_dir=STORE_DIR):
+    """
+    Reads the csv of every release and writes it to the store.
+
+    Args:
+        releases: a dictionary in which the keys are the release versions and
+        the values are the paths of their csvs, like the one returned by
+        release_data.discover_releases.
+        store_dir: a string or Path representing the folder of the store.
+    """
+    for version, file_name in releases.items():
+        write_release(read_csv_to_var(file_name), version, store_dir)
+
+
+def list_releases(store_dir=STORE_DIR):
+    """
+    Lists the releases in the store.
+
+    Args:
+        store_dir: a string or Path representing the folder of the store.
+
+    Returns: A list of the release versions, in release order.
+    """
+    if not Path(store_dir).exists():
+        return []
+    return sorted(
+        (
+            path.name
+            for path in Path(store_dir).iterdir()
+            if path.is_dir() and not path.name.startswith(".")
+        ),
+        key=release_sort_key,
+    )
+
+
+def open_release(version, store_dir=STORE_DIR):
+    """
+    Memory-maps the columns of one stored release. Nothing is read from disk
+    until the arrays are used.
+
+    Args:
+        version: a string representing the release version.
+        store_dir: a string or Path representing the folder of the store.
+
+    Returns: A dictionary of read-only numpy arrays, one per entry of
+    STORE_DTYPES plus "names", and the list of disaster types of the
+    release under "disasters".
+
+    Raises:
+        ValueError: if the regions of the release were found with other
+        region keywords or categories than the current ones, in which case
+        the release has to be stored again.
+    """
+    path = Path(store_dir) / version
+    try:
+        with open(path / "regions.json", encoding="utf-8") as file:
+            regions = json.load(file)
+    except FileNotFoundError:
+        regions = {}
+    if regions != {
+        "fingerprint": KEYWORD_FINGERPRINT,
+        "categories": REGION_CATEGORIES,
+    }:
+        raise ValueError(
+            f"Release {version} was stored with other region keywords; store"
+            " it again with write_release"
+        )
+    release = {
+        column: np.load(path / f"{column}.npy", mmap_mode="r")
+        for column in [*STORE_DTYPES, "names"]
+    }
+    with open(path / "disasters.json", encoding="utf-8") as file:
+        release["disasters"] = json.load(file)
+    return release
+
+
+def organize_store(
+    region_list, yrs, drs, buckets, versions=None, store_dir=STORE_DIR
+):
+    """
+    Gives the same dictionaries as organize_regions for every stored release,
+    straight from the memory-mapped columns.
+
+    Args:
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group, or a
+        list of the first year of each group.
+        versions: an optional list of the releases to organize. By default,
+        every release in the store.
+        store_dir: a string or Path representing the folder of the store.
+
+    Returns: A dictionary in which the keys are the release versions and the
+    values are the cost and deaths dictionaries for that release.
+    """
+    if versions is None:
+        versions = list_releases(store_dir)
+    return {
+        version: organize_spread(
+            spread_columns(
+                open_release(version, store_dir), region_list, yrs, drs
+            ),
+            region_list,
+            yrs,
+            drs,
+            buckets,
+        )
+        for version in versions
+    }
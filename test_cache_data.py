@@ -0,0 +1,271 @@
+"""
+Test the functions in cache_data.py
+
+Imports:
+pytest to write pytests!
+pandas to compare dataframes for the pytests!
+shutil to copy the bundled dataset somewhere it can be edited.
+os to age cached files.
+time to compare how long a cache hit and a recompute take.
+"""
+
+import os
+import shutil
+import time
+import pandas as pd
+import pytest
+
+import cache_data
+from bench_data import generate_events
+from cache_data import (
+    cached_organize_regions,
+    dataset_cache_path,
+    evict_spreads,
+    load_dataset,
+    load_region_table,
+    save_region_table,
+)
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    locate_all_regions,
+    retrieve_unique_years,
+    retrieve_unique_disaster_types,
+    fill_all_regions,
+    partition_regions,
+    tally_regions,
+    organize_regions,
+)
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+
+
+def test_load_dataset_round_trip(tmp_path):
+    """
+    Check that the first load writes the cached copy, and that both the first
+    and the cached load give back exactly what processing the csv gives.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    expected = read_csv_to_var(DATASET_PATH)
+    parse_all_years(expected)
+    expected["Region"] = locate_all_regions(expected["Name"])
+
+    cache_dir = tmp_path / "cache"
+    first = load_dataset(DATASET_PATH, cache_dir)
+    assert dataset_cache_path(DATASET_PATH, cache_dir).exists()
+    second = load_dataset(DATASET_PATH, cache_dir)
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+
+
+def test_load_dataset_invalidated_by_edit(tmp_path):
+    """
+    Check that editing the csv makes the next load re-read it, and that the
+    cached copy of the old version is removed.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    csv_path = tmp_path / "events.csv"
+    shutil.copy(DATASET_PATH, csv_path)
+    cache_dir = tmp_path / "cache"
+    old_rows = len(load_dataset(csv_path, cache_dir))
+    old_path = dataset_cache_path(csv_path, cache_dir)
+
+    with open(csv_path, "a", encoding="utf-8") as file:
+        file.write(
+            '"Western Wildfire (2024)","Wildfire",20240101,20240102,1,2\n'
+        )
+    result = load_dataset(csv_path, cache_dir)
+    assert len(result) == old_rows + 1
+    assert result["Region"].iloc[-1] == "Western"
+    assert not old_path.exists()
+    assert list(cache_dir.glob("*.parquet")) == [
+        dataset_cache_path(csv_path, cache_dir)
+    ]
+
+
+def test_load_dataset_keeps_same_name_elsewhere(tmp_path):
+    """
+    Check that loading a csv does not remove the cached copy of a csv with
+    the same name in another folder, like the csvs of two releases.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    cache_dir = tmp_path / "cache"
+    csv_paths = []
+    for release in ["17.17", "17.18"]:
+        (tmp_path / release).mkdir()
+        csv_paths.append(tmp_path / release / "events.csv")
+        shutil.copy(DATASET_PATH, csv_paths[-1])
+        load_dataset(csv_paths[-1], cache_dir)
+    for csv_path in csv_paths:
+        assert dataset_cache_path(csv_path, cache_dir).exists()
+
+
+def test_region_table_reused(tmp_path, monkeypatch):
+    """
+    Check that loading a dataset saves the regions of its names, that a saved
+    region is trusted on the next load, and that changing the keyword
+    fingerprint starts a new table and removes the old one.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+        monkeypatch: A pytest helper used to change the keyword fingerprint.
+    """
+    cache_dir = tmp_path / "cache"
+    load_dataset(DATASET_PATH, cache_dir)
+    region_table = load_region_table(cache_dir)
+    assert region_table["Hurricane Allen (August 1980)"] == "Southern"
+
+    # a region that could only have come from the saved table
+    region_table["Hurricane Allen (August 1980)"] = "Western"
+    save_region_table(region_table, cache_dir)
+    dataset_cache_path(DATASET_PATH, cache_dir).unlink()
+    result = load_dataset(DATASET_PATH, cache_dir)
+    assert result["Region"].iloc[1] == "Western"
+
+    monkeypatch.setattr(cache_data, "KEYWORD_FINGERPRINT", "edited")
+    assert not load_region_table(cache_dir)
+    save_region_table({}, cache_dir)
+    assert [path.name for path in cache_dir.glob("regions-*.json")] == [
+        "regions-edited.json"
+    ]
+
+
+@pytest.fixture(name="dataset", scope="module")
+def fixture_dataset():
+    """
+    Processes the bundled dataset the way the notebook does.
+
+    Returns: A tuple of the region dictionary, the years, and the disaster
+    types.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    return (
+        fill_all_regions(dataframe, ["Western", "Midwestern", "Southern"]),
+        retrieve_unique_years(dataframe),
+        retrieve_unique_disaster_types(dataframe),
+    )
+
+
+def test_cached_organize_regions_reuses_sums(dataset, tmp_path, monkeypatch):
+    """
+    Check that the cached results match organize_regions for several bucket
+    sizes, and that only the first call sums the regions.
+
+    Args:
+        dataset: The processed bundled dataset.
+        tmp_path: A temporary folder provided by pytest.
+        monkeypatch: A pytest helper used to count calls to the tally.
+    """
+    region_dict, yrs, drs = dataset
+    calls = []
+    tally_regions = cache_data.tally_regions
+    monkeypatch.setattr(
+        cache_data,
+        "tally_regions",
+        lambda region_dict: calls.append(1) or tally_regions(region_dict),
+    )
+    for buckets in [5, 1, 10, 5]:
+        result = cached_organize_regions(
+            region_dict, yrs, drs, buckets, tmp_path
+        )
+        assert result == organize_regions(region_dict, yrs, drs, buckets)
+    assert len(calls) == 1
+
+    cached_organize_regions(region_dict, yrs, drs[:2], 5, tmp_path)
+    assert len(calls) == 2
+
+
+def test_cached_organize_regions_misses_other_inputs(dataset, tmp_path):
+    """
+    Check that years of another type and region dataframes that were split
+    differently are not handed the sums cached for the original inputs.
+
+    Args:
+        dataset: The processed bundled dataset.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    region_dict, yrs, drs = dataset
+    int_years = [int(year) for year in yrs]
+    cached_organize_regions(region_dict, int_years, drs, 5, tmp_path)
+    assert cached_organize_regions(
+        region_dict, yrs, drs, 5, tmp_path
+    ) == organize_regions(region_dict, yrs, drs, 5)
+
+    filtered = {
+        region_name: frame[frame["Deaths"] > 0]
+        for region_name, frame in region_dict.items()
+    }
+    assert cached_organize_regions(
+        filtered, yrs, drs, 5, tmp_path
+    ) == organize_regions(filtered, yrs, drs, 5)
+    assert len(list((tmp_path / "spreads").glob("*.npy"))) == 3
+
+
+def test_cached_organize_regions_hit_is_cheap(tmp_path):
+    """
+    Check that a cache hit takes less time than summing the regions again,
+    on a synthetic dataset large enough for the difference to show, and that
+    columns the sums do not read (like the names) are not fingerprinted.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    dataframe = generate_events(300_000)
+    parse_all_years(dataframe)
+    region_dict = partition_regions(dataframe, ["Western", "Southern"])
+    yrs = retrieve_unique_years(dataframe)
+    drs = retrieve_unique_disaster_types(dataframe)
+    cached_organize_regions(region_dict, yrs, drs, 5, tmp_path)
+
+    def fastest(function):
+        seconds = []
+        for _ in range(3):
+            start = time.perf_counter()
+            function()
+            seconds.append(time.perf_counter() - start)
+        return min(seconds)
+
+    hit = fastest(
+        lambda: cached_organize_regions(region_dict, yrs, drs, 5, tmp_path)
+    )
+    assert hit < fastest(lambda: tally_regions(region_dict))
+
+    renamed = {
+        region_name: frame.assign(Name="renamed")
+        for region_name, frame in region_dict.items()
+    }
+    assert cache_data.spread_cache_path(
+        renamed, yrs, drs, tmp_path
+    ) == cache_data.spread_cache_path(region_dict, yrs, drs, tmp_path)
+
+
+def test_evict_spreads_removes_least_recently_used(dataset, tmp_path):
+    """
+    Check that once the cache is over its size, the sums used least recently
+    are removed and the ones used most recently are kept.
+
+    Args:
+        dataset: The processed bundled dataset.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    region_dict, yrs, drs = dataset
+    for i in range(1, 4):
+        cached_organize_regions(region_dict, yrs, drs[:i], 1, tmp_path)
+    paths = sorted((tmp_path / "spreads").glob("*.npy"))
+    assert len(paths) == 3
+    for age, path in enumerate(paths):
+        os.utime(path, (1000 + age, 1000 + age))
+
+    sizes = [path.stat().st_size for path in paths]
+    removed = evict_spreads(tmp_path, sizes[1] + sizes[2])
+    assert removed == [paths[0]]
+    assert evict_spreads(tmp_path, 0) == [paths[1]]
+    assert list((tmp_path / "spreads").glob("*.npy")) == [paths[2]]
@@ -0,0 +1,111 @@
+"""
+Test the functions in compact_data.py
+
+Imports:
+pytest to write pytests!
+pandas to compare decoded tables with the loaded dataset.
+"""
+
+import pytest
+import pandas as pd
+
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    retrieve_unique_years,
+    retrieve_unique_disaster_types,
+    partition_regions,
+    organize_regions,
+    organize_spread,
+)
+from compact_data import EventTable, encode_dates
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+encode_dates_cases = [
+    # Full dates
+    (["20230415", "19800101"], [20230415, 19800101]),
+    # Dates already shortened to years
+    (["2023"], [20230000]),
+]
+
+
+@pytest.mark.parametrize("dates,numbers", encode_dates_cases)
+def test_encode_dates(dates, numbers):
+    """
+    Check that dates are turned into numbers.
+
+    Args:
+        dates: a list of date strings.
+        numbers: the list of numbers they should become.
+    """
+    assert encode_dates(pd.Series(dates)).tolist() == numbers
+
+
+@pytest.mark.parametrize("parse", [False, True])
+def test_event_table_round_trip(parse):
+    """
+    Check that encoding the bundled dataset and decoding it again gives back
+    the same dataframe, whether or not its dates were shortened to years,
+    and that the table is much smaller than the dataframe.
+
+    Args:
+        parse: a boolean; if True, parse_all_years is run first.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    if parse:
+        parse_all_years(dataframe)
+    table = EventTable.from_frame(dataframe)
+    assert len(table) == 376
+    pd.testing.assert_frame_equal(
+        table.to_frame().drop(columns="Region"), dataframe
+    )
+    assert table.nbytes() * 5 < dataframe.memory_usage(deep=True).sum()
+
+
+def test_event_table_partition_and_spread():
+    """
+    Check that splitting a table into regions matches partition_regions,
+    that the regions share the table's dictionaries, and that summing the
+    table matches organize_regions.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    yrs = retrieve_unique_years(dataframe)
+    drs = retrieve_unique_disaster_types(dataframe)
+    region_dict = partition_regions(dataframe, REGION_LIST)
+
+    table = EventTable.from_frame(dataframe)
+    for region_name, region_table in table.partition(REGION_LIST).items():
+        assert region_table.names is table.names
+        assert list(region_table.to_frame()["Name"]) == list(
+            region_dict[region_name]["Name"]
+        )
+
+    result = organize_spread(
+        table.spread(REGION_LIST, yrs, drs), REGION_LIST, yrs, drs, 5
+    )
+    expected = organize_regions(region_dict, yrs, drs, 5)
+    for got, want in zip(result, expected):
+        for region_name in REGION_LIST:
+            for disaster in drs:
+                assert got[region_name][disaster] == pytest.approx(
+                    want[region_name][disaster]
+                )
+
+
+def test_event_tables_share_disaster_dictionary():
+    """
+    Check that tables coded against the same list of disaster types agree on
+    their codes.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    disasters = []
+    first = EventTable.from_frame(dataframe.iloc[:100], disasters)
+    second = EventTable.from_frame(dataframe.iloc[100:], disasters)
+    assert first.disasters is second.disasters
+    assert sorted(disasters) == sorted(dataframe["Disaster"].unique())
+    decoded = pd.concat([first.to_frame(), second.to_frame()])
+    assert list(decoded["Disaster"]) == list(dataframe["Disaster"])
@@ -0,0 +1,127 @@
+"""
+Test the RegionCube in cube_data.py
+
+Imports:
+pytest to write pytests!
+numpy to check the cube's arrays.
+pandas to check the time series against its rolling windows.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube_data import RegionCube
+from graph_data import plottable_by_region, plottable_by_time
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    retrieve_unique_years,
+    retrieve_unique_disaster_types,
+    fill_all_regions,
+    organize_regions,
+)
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+
+@pytest.fixture(name="dataset", scope="module")
+def fixture_dataset():
+    """
+    Processes the bundled dataset the way the notebook does.
+
+    Returns: A tuple of the region dictionary, the years, and the disaster
+    types.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    return (
+        fill_all_regions(dataframe, REGION_LIST),
+        retrieve_unique_years(dataframe),
+        retrieve_unique_disaster_types(dataframe),
+    )
+
+
+@pytest.mark.parametrize("buckets", [1, 5, 10])
+def test_cube_matches_organize_regions(dataset, buckets):
+    """
+    Check that a bucketed cube converts back into the same dictionaries
+    organize_regions returns.
+
+    Args:
+        dataset: The processed bundled dataset.
+        buckets: An int with the bucket size.
+    """
+    region_dict, yrs, drs = dataset
+    cube = RegionCube.from_regions(region_dict, yrs, drs).bucket(buckets)
+    assert cube.to_dicts() == organize_regions(region_dict, yrs, drs, buckets)
+
+
+def test_cube_plottables_match_graph_data(dataset):
+    """
+    Check that the cube's plottable dataframes match the ones graph_data
+    builds from the dictionaries, and that the bucket labels are generated.
+
+    Args:
+        dataset: The processed bundled dataset.
+    """
+    region_dict, yrs, drs = dataset
+    cube = RegionCube.from_regions(region_dict, yrs, drs).bucket(5)
+    cost, deaths = organize_regions(region_dict, yrs, drs, 5)
+    assert cube.years[0] == f"{yrs[0]} - {yrs[4]}"
+    assert cube.years[-1].endswith(f" - {yrs[-1]}")
+    assert cube.by_region("deaths").equals(plottable_by_region(deaths, drs))
+    assert cube.by_time("cost", "Western").equals(
+        plottable_by_time(cost, "Western", cube.years)
+    )
+
+
+def test_cube_select_is_a_view(dataset):
+    """
+    Check that selecting from the cube does not copy its values, and that
+    a cube with mismatched labels is refused.
+
+    Args:
+        dataset: The processed bundled dataset.
+    """
+    region_dict, yrs, drs = dataset
+    cube = RegionCube.from_regions(region_dict, yrs, drs)
+    selected = cube.select("deaths", "Southern", drs[0])
+    assert selected.shape == (len(yrs),)
+    assert np.shares_memory(selected, cube.values)
+    assert (
+        cube.select("cost", "Western", drs[0], yrs[0])
+        == cube.values[0, 0, 0, 0]
+    )
+    with pytest.raises(ValueError):
+        RegionCube(cube.values, REGION_LIST[:2], drs, yrs)
+
+
+def test_cube_time_series_match_pandas(dataset):
+    """
+    Check that the cube's moving sums and running totals match what pandas
+    gives for one region and disaster type laid out on every calendar year,
+    and that a bucketed cube is refused.
+
+    Args:
+        dataset: The processed bundled dataset.
+    """
+    region_dict, yrs, drs = dataset
+    cube = RegionCube.from_regions(region_dict, yrs, drs)
+    series = pd.Series(
+        cube.select("cost", "Southern", drs[0]), index=[int(y) for y in yrs]
+    ).reindex(range(int(yrs[0]), int(yrs[-1]) + 1), fill_value=0)
+    expected = series.rolling(5, min_periods=1).sum()
+    assert np.allclose(
+        cube.rolling(5).select("cost", "Southern", drs[0]),
+        expected[[int(y) for y in yrs]],
+    )
+    assert np.allclose(
+        cube.cumulative().select("cost", "Southern", drs[0]),
+        series.cumsum()[[int(y) for y in yrs]],
+    )
+    assert cube.growth().years == cube.years
+    with pytest.raises(ValueError):
+        cube.bucket(5).rolling(5)
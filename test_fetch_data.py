@@ -0,0 +1,320 @@
+"""
+Test the functions in fetch_data.py against a small HTTP server that runs on
+this machine, standing in for the NCEI website.
+
+Imports:
+pytest to write pytests!
+requests to check the error raised when a server keeps failing.
+hashlib to work out the checksums the downloads should have.
+threading and http.server to run the stand-in server.
+os to look at the files the downloads leave behind.
+time to keep the stand-in server busy while concurrent downloads pile up.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+
+from process_data import read_csv_to_var
+from fetch_data import (
+    EVENTS_CSV_PATTERN,
+    download_archive,
+    extract_members,
+    fetch_all,
+    open_member,
+    read_download_record,
+    write_download_record,
+    write_to_csv,
+)
+
+# The archive bundled with the repository, served by the stand-in server.
+ARCHIVE_PATH = "209268.17.17.tar.gz"
+with open(ARCHIVE_PATH, "rb") as archive_file:
+    ARCHIVE_BYTES = archive_file.read()
+ARCHIVE_SHA256 = hashlib.sha256(ARCHIVE_BYTES).hexdigest()
+ARCHIVE_ETAG = f'"{ARCHIVE_SHA256[:16]}"'
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """
+    Serves ARCHIVE_BYTES at every path, honoring If-None-Match, Range, and
+    If-Range the way a real web server would, and remembering the headers of
+    every request it gets. The server can also be told to fail its next few
+    requests, and counts how many requests it answers at the same time.
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Answers one GET request.
+        """
+        server = self.server
+        server.seen_headers.append(dict(self.headers))
+        with server.lock:
+            server.active += 1
+            server.most_active = max(server.most_active, server.active)
+            failing = server.failures > 0
+            server.failures -= failing
+        try:
+            time.sleep(server.delay)
+            if failing:
+                self.send_response(503)
+                self.end_headers()
+                return
+            self.answer()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def answer(self):
+        """
+        Sends the archive, or the part of it, that a request asked for.
+        """
+        if self.headers.get("If-None-Match") == ARCHIVE_ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = ARCHIVE_BYTES
+        status = 200
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if range_header and if_range in (None, ARCHIVE_ETAG):
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            if start >= len(ARCHIVE_BYTES):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.end_headers()
+                return
+            body = ARCHIVE_BYTES[start:]
+            status = 206
+        self.send_response(status)
+        self.send_header("ETag", ARCHIVE_ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """
+        Keeps the server quiet during the tests.
+        """
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    """
+    Runs the stand-in server in a background thread for one test.
+
+    Returns: A tuple of the URL the archive is served at, the list of
+    headers of every request the server has seen so far, and the server.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveHandler)
+    server.seen_headers = []
+    server.lock = threading.Lock()
+    server.failures = 0
+    server.delay = 0
+    server.active = 0
+    server.most_active = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/{ARCHIVE_PATH}"
+    yield url, server.seen_headers, server
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_then_skip_unchanged(server_url, tmp_path):
+    """
+    Check that the first download writes the archive and its record, and that
+    the second one sends the ETag back and downloads nothing.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    url, seen_headers, _ = server_url
+    tarpath = str(tmp_path / ARCHIVE_PATH)
+    assert download_archive(url, tarpath, checksum=ARCHIVE_SHA256)
+    with open(tarpath, "rb") as file:
+        assert file.read() == ARCHIVE_BYTES
+    assert read_download_record(tarpath)["sha256"] == ARCHIVE_SHA256
+
+    assert not download_archive(url, tarpath)
+    assert seen_headers[-1]["If-None-Match"] == ARCHIVE_ETAG
+
+
+def test_download_resumes_partial_file(server_url, tmp_path):
+    """
+    Check that an interrupted download only asks for the missing bytes and
+    still ends up with the complete archive.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    url, seen_headers, _ = server_url
+    tarpath = str(tmp_path / ARCHIVE_PATH)
+    with open(f"{tarpath}.part", "wb") as file:
+        file.write(ARCHIVE_BYTES[:1000])
+    write_download_record(tarpath, {"partial_etag": ARCHIVE_ETAG})
+
+    assert download_archive(url, tarpath, checksum=ARCHIVE_SHA256)
+    assert seen_headers[-1]["Range"] == "bytes=1000-"
+    with open(tarpath, "rb") as file:
+        assert file.read() == ARCHIVE_BYTES
+    assert not os.path.exists(f"{tarpath}.part")
+
+
+def test_download_finishes_complete_partial_file(server_url, tmp_path):
+    """
+    Check that a partial file that was already complete when the download
+    was interrupted is checked and kept, not downloaded again.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    url, seen_headers, _ = server_url
+    tarpath = str(tmp_path / ARCHIVE_PATH)
+    with open(f"{tarpath}.part", "wb") as file:
+        file.write(ARCHIVE_BYTES)
+    write_download_record(tarpath, {"partial_etag": ARCHIVE_ETAG})
+
+    assert download_archive(url, tarpath, checksum=ARCHIVE_SHA256)
+    assert len(seen_headers) == 1
+    assert seen_headers[0]["Range"] == f"bytes={len(ARCHIVE_BYTES)}-"
+    with open(tarpath, "rb") as file:
+        assert file.read() == ARCHIVE_BYTES
+    assert read_download_record(tarpath) == {
+        "etag": ARCHIVE_ETAG,
+        "last_modified": None,
+        "sha256": ARCHIVE_SHA256,
+    }
+
+
+def test_download_rejects_bad_checksum(server_url, tmp_path):
+    """
+    Check that a download whose checksum does not match is thrown away.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    url, _, _ = server_url
+    tarpath = str(tmp_path / ARCHIVE_PATH)
+    with pytest.raises(ValueError):
+        download_archive(url, tarpath, checksum="0" * 64)
+    assert not os.path.exists(tarpath)
+    assert not os.path.exists(f"{tarpath}.part")
+
+
+def test_write_to_csv_extracts_once(server_url, tmp_path, monkeypatch):
+    """
+    Check that the archive is extracted after it is downloaded, and left alone
+    when it has not changed.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+        monkeypatch: A pytest helper used to run inside tmp_path.
+    """
+    url, _, _ = server_url
+    monkeypatch.chdir(tmp_path)
+    csv_path = tmp_path / "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+    write_to_csv(url, ARCHIVE_PATH)
+    assert csv_path.exists()
+
+    csv_path.unlink()
+    write_to_csv(url, ARCHIVE_PATH)
+    assert not csv_path.exists()
+
+
+def test_fetch_all_limits_each_host(server_url, tmp_path):
+    """
+    Check that several archives are downloaded and extracted next to their
+    destination paths, with no more than per_host downloads from the server
+    at a time.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    url, _, server = server_url
+    server.delay = 0.05
+    downloads = {
+        f"{url}?release={i}": str(tmp_path / str(i) / ARCHIVE_PATH)
+        for i in range(4)
+    }
+    for tarpath in downloads.values():
+        os.makedirs(os.path.dirname(tarpath))
+    results = fetch_all(downloads, per_host=2)
+    csv_name = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+    assert list(results.values()) == [[csv_name]] * 4
+    for i in range(4):
+        assert (tmp_path / str(i) / csv_name).exists()
+    assert server.most_active == 2
+
+    assert fetch_all(downloads) == {download: [] for download in downloads}
+
+
+def test_fetch_all_retries_failures(server_url, tmp_path):
+    """
+    Check that a download is tried again when the server is failing, and
+    that the error is raised once the retries run out.
+
+    Args:
+        server_url: The stand-in server's URL, its seen request headers, and
+        the server itself.
+        tmp_path: A temporary folder provided by pytest.
+    """
+    url, seen_headers, server = server_url
+    tarpath = str(tmp_path / ARCHIVE_PATH)
+    server.failures = 2
+    results = fetch_all(
+        {url: tarpath}, backoff=0.01, checksums={url: ARCHIVE_SHA256}
+    )
+    assert results[url]
+    assert len(seen_headers) == 3
+
+    os.remove(tarpath)
+    server.failures = 3
+    with pytest.raises(requests.HTTPError):
+        fetch_all({url: tarpath}, retries=2, backoff=0.01)
+    assert len(seen_headers) == 6
+
+
+def test_extract_members_only_events_csv(tmp_path):
+    """
+    Check that extracting with the events csv pattern writes the csv and
+    nothing else from the archive.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    extracted = extract_members(ARCHIVE_PATH, EVENTS_CSV_PATTERN, tmp_path)
+    csv_name = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+    assert extracted == [csv_name]
+    written = [path for path in tmp_path.rglob("*") if path.is_file()]
+    assert written == [tmp_path / csv_name]
+
+
+def test_open_member_reads_csv_without_extracting():
+    """
+    Check that the events csv can be loaded straight out of the archive, and
+    that asking for a file that is not there raises an error.
+    """
+    with open_member(ARCHIVE_PATH) as csv_file:
+        dataframe = read_csv_to_var(csv_file)
+    assert len(dataframe) == 376
+    with pytest.raises(FileNotFoundError):
+        with open_member(ARCHIVE_PATH, "*.docx"):
+            pass
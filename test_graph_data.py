@@ -0,0 +1,58 @@
+"""
+Test the batch rendering functions in graph_data.py
+
+Imports:
+pandas to make data to plot.
+"""
+
+import pandas as pd
+
+from graph_data import plot_spec, render_figures
+
+
+def make_specs(folder, deaths):
+    """
+    Makes two plots to draw: one png and one svg.
+
+    Args:
+        folder: a Path representing where to draw the plots.
+        deaths: a list of two numbers to plot in the svg.
+
+    Returns: A list of dictionaries made by plot_spec.
+    """
+    cost = pd.DataFrame(
+        {"Drought": [1.0, 2.0], "Flooding": [3.0, 0.0]},
+        index=["1980 - 1984", "1985 - 1989"],
+    )
+    return [
+        plot_spec(cost, folder / "cost.png", 0, ["Years", "Cost", "Cost"]),
+        plot_spec(
+            pd.DataFrame({"Drought": deaths}, index=["Western", "Southern"]),
+            folder / "deaths.svg",
+            45,
+            ["Region", "Deaths", "Deaths"],
+        ),
+    ]
+
+
+def test_render_figures_skips_unchanged_plots(tmp_path):
+    """
+    Check that every plot is drawn to its file the first time, nothing is
+    drawn again while the data stays the same, and only a plot whose data
+    changed (or whose file went missing) is drawn again.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    manifest = tmp_path / "figures.json"
+    specs = make_specs(tmp_path, [5, 6])
+    paths = [spec["path"] for spec in specs]
+
+    assert render_figures(specs, manifest, 2) == paths
+    assert (tmp_path / "cost.png").read_bytes().startswith(b"\x89PNG")
+    assert b"<svg" in (tmp_path / "deaths.svg").read_bytes()
+    assert not render_figures(specs, manifest, 2)
+
+    assert render_figures(make_specs(tmp_path, [5, 7]), manifest) == paths[1:]
+    (tmp_path / "cost.png").unlink()
+    assert render_figures(specs, manifest) == paths
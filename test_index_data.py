@@ -0,0 +1,111 @@
+"""
+Test the functions in index_data.py
+
+Imports:
+pytest to write pytests!
+numpy to check that slices share memory with the index.
+"""
+
+import numpy as np
+import pytest
+
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    locate_all_regions,
+    generic_split_data,
+    partition_regions,
+)
+from index_data import EventIndex
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+select_cases = [
+    # Nothing given
+    (None, None, None),
+    # A region, a region and disaster type, and all three
+    ("Southern", None, None),
+    ("Southern", "Severe Storm", None),
+    ("Southern", "Severe Storm", 2011),
+    # Combinations that are gathered from several slices
+    (None, "Drought", None),
+    (None, None, 2005),
+    ("Midwestern", None, 2012),
+    # Labels that are not in the dataset
+    ("Southern", "Volcano", None),
+    (None, None, 1987),
+]
+
+
+@pytest.fixture(name="dataset")
+def fixture_dataset():
+    """
+    Loads the bundled dataset with its regions.
+
+    Returns: The dataframe.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    dataframe["Region"] = locate_all_regions(dataframe["Name"])
+    return dataframe
+
+
+@pytest.mark.parametrize("region,disaster,year", select_cases)
+def test_select_matches_mask(dataset, region, disaster, year):
+    """
+    Check that selecting from the index gives the same rows as filtering
+    the dataset with a boolean mask.
+
+    Args:
+        dataset: The bundled dataset with its regions.
+        region: a region label, or None.
+        disaster: a disaster type label, or None.
+        year: a starting year, or None.
+    """
+    keep = np.ones(len(dataset), dtype=bool)
+    for column, label in zip(EventIndex.KEYS, (region, disaster, year)):
+        if label is not None:
+            keep &= (dataset[column] == label).to_numpy()
+    result = EventIndex(dataset).select(region, disaster, year)
+    assert sorted(result["Name"]) == sorted(dataset["Name"][keep])
+
+
+def test_select_returns_views(dataset):
+    """
+    Check that selecting a region, disaster type, and year slices the sorted
+    dataframe instead of copying it.
+
+    Args:
+        dataset: The bundled dataset with its regions.
+    """
+    index = EventIndex(dataset)
+    result = index.select("Southern", "Severe Storm")
+    assert len(result) > 0
+    assert np.shares_memory(
+        result["Deaths"].to_numpy(), index.frame["Deaths"].to_numpy()
+    )
+
+
+def test_split_and_partition_match_process_data(dataset):
+    """
+    Check that splitting with the index gives the same groups as
+    generic_split_data and partition_regions.
+
+    Args:
+        dataset: The bundled dataset with its regions.
+    """
+    index = EventIndex(dataset.drop(columns="Region"))
+    for region_name, expected in partition_regions(
+        dataset, REGION_LIST
+    ).items():
+        result = index.partition(REGION_LIST)[region_name]
+        assert sorted(result["Name"]) == sorted(expected["Name"])
+
+        drs = expected["Disaster"].unique()
+        split = index.split("Disaster", region=region_name)
+        for disaster, subframe in generic_split_data(
+            expected, "Disaster", drs
+        ).items():
+            assert sorted(split[disaster]["Name"]) == sorted(subframe["Name"])
@@ -0,0 +1,53 @@
+"""
+Test the functions in lazy_import.py
+
+Imports:
+pytest to write pytests!
+subprocess and sys to import the pipeline modules in a fresh interpreter.
+"""
+
+import subprocess
+import sys
+import pytest
+
+from lazy_import import lazy_import
+
+
+def test_pipeline_modules_import_without_heavy_libraries():
+    """
+    Check that importing the pipeline modules in a fresh interpreter does not
+    load pandas, numpy, requests, or matplotlib, and that using a function
+    does load what it needs.
+    """
+    script = (
+        "import sys\n"
+        "import fetch_data, process_data, graph_data, cache_data\n"
+        "heavy = ['pandas.core.frame', 'numpy.core.multiarray',\n"
+        "         'requests.sessions', 'matplotlib.pyplot']\n"
+        "print([name for name in heavy if name in sys.modules])\n"
+        "process_data.read_csv_to_var(\n"
+        "    '0209268/17.17/data/0-data/events-US-1980-2023.csv')\n"
+        "print('pandas.core.frame' in sys.modules)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split("\n")
+    assert output[:2] == ["[]", "True"]
+
+
+def test_lazy_import_reuses_loaded_modules():
+    """
+    Check that a module that was already imported is handed back as is.
+    """
+    assert lazy_import("sys") is sys
+
+
+def test_lazy_import_missing_module():
+    """
+    Check that a module that is not installed is reported right away.
+    """
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("no_such_module_here")
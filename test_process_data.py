@@ -24,23 +24,43 @@ functions that will be tested anyway.
 Testing assemble_one_disaster is something that happens as a result of testing
 assemble_region_data.
 
-Testing the organize_regions function is not the best use of time because
-it calls other functions that are being tested in a for loop.
+Testing the organize_regions function is done by checking it against
+assemble_region_data on the bundled dataset, since it no longer calls it in a
+for loop but should give back the same numbers.
 """
 
+import numpy as np
 import pytest
 import pandas as pd
 
 from process_data import (
+    read_csv_to_var,
     parse_year,
+    parse_all_years,
     retrieve_unique_disaster_types,
+    retrieve_unique_years,
     geo_locator,
+    locate_all_regions,
+    partition_regions,
     fill_one_region,
+    fill_all_regions,
     generic_sum_by_type,
     sum_years_in_buckets,
     assemble_region_data,
+    bucket_years,
+    sum_in_buckets,
+    year_buckets,
+    organize_regions,
+    organize_csv_in_chunks,
+    attribution_weights,
+    organize_attributed,
+    rolling_sum,
+    cumulative_sum,
+    year_over_year,
 )
 
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
 
 # Define sets of test cases.
 parse_year_cases = [
@@ -150,6 +170,26 @@ fill_one_region_cases = [
     ),
 ]
 
+partition_regions_cases = [
+    # Check empty.
+    ([], ["Western"], {"Western": []}),
+    # Check that the function functions as expected.
+    (
+        [
+            "West Storm",
+            "Houston Flood",
+            "West Fire",
+            "Northeast Southern Storm",
+        ],
+        ["Western", "Southern", "Northeastern"],
+        {
+            "Western": ["West Storm", "West Fire"],
+            "Southern": ["Houston Flood"],
+            "Northeastern": [],
+        },
+    ),
+]
+
 generic_sum_by_type_cases = [
     # Check empty.
     (pd.DataFrame({"Numbers": []}), "Numbers", 0),
@@ -164,6 +204,29 @@ sum_years_in_buckets_cases = [
     ([1, 2, 3, 4], 2, [3, 7]),
 ]
 
+sum_in_buckets_cases = [
+    # Check empty.
+    ([], [0], [0]),
+    # Check that the function functions as expected.
+    ([1, 2, 3], [1], [5]),
+    # Check buckets of different sizes, including an empty one.
+    ([1, 2, 3, 4, 5], [0, 2, 2, 4], [3, 0, 7, 5]),
+]
+
+year_buckets_cases = [
+    # Check empty.
+    ([], 5, [], []),
+    # Check buckets of a fixed size.
+    (["1980", "1981", "1982"], 2, [0, 2], ["1980 - 1981", "1982"]),
+    # Check buckets starting at given years, with gaps in the years.
+    (
+        ["1979", "1980", "1981", "1983", "1990"],
+        [1980, 1985, 1990, 1995],
+        [1, 4, 4, 5],
+        ["1980 - 1984", "1985 - 1989", "1990 - 1994", "1995"],
+    ),
+]
+
 assemble_region_data_cases = [
     # Check some empty cases.
     (
@@ -193,6 +256,16 @@ assemble_region_data_cases = [
 ]
 
 
+# Per-year sums, the years they fall in (1983 has no disasters), a window,
+# and the moving sums and year over year growth of them.
+time_series_cases = [
+    ([1, 2, 3, 4], [1980, 1981, 1982, 1983], 2, [1, 3, 5, 7], [None, 1, 0.5]),
+    ([1, 2, 3, 4], [1980, 1981, 1982, 1983], 10, [1, 3, 6, 10], [None, 1]),
+    ([1, 2, 4], ["1981", "1982", "1984"], 2, [1, 3, 4], [None, 1, None]),
+    ([0, 5, 5], [2000, 2001, 2002], 1, [0, 5, 5], [None, None, 0]),
+]
+
+
 # Define standard testing functions to check functions' outputs given certain
 # inputs defined above.
 @pytest.mark.parametrize("date,year", parse_year_cases)
@@ -264,6 +337,29 @@ def test_fill_one_region(dataframe, region_name, region_disasters):
     assert ((result == region_disasters).all()).all()
 
 
+@pytest.mark.parametrize(
+    "names,region_list,region_names", partition_regions_cases
+)
+def test_partition_regions(names, region_list, region_names):
+    """
+    Given a list of disaster names and a list of U.S. regions, check that the
+    function splits the disasters into one dataframe per requested region,
+    keeping their order and dropping the ones with no single region.
+
+    Args:
+        names: A list of strings with descriptions of natural disasters.
+        region_list: A list of strings with names of regions in the U.S.
+        region_names: A dictionary mapping each region to the names of the
+        disasters expected in its dataframe.
+    """
+    dataframe = pd.DataFrame({"Name": names, "Deaths": range(len(names))})
+    result = partition_regions(dataframe, region_list)
+    assert list(result) == region_list
+    for region_name, region_df in result.items():
+        assert region_df["Name"].tolist() == region_names[region_name]
+        assert region_df.index.tolist() == list(range(len(region_df)))
+
+
 @pytest.mark.parametrize(
     "dataframe,desired_sum,total", generic_sum_by_type_cases
 )
@@ -325,3 +421,297 @@ def test_assemble_region_data(dataframe, yrs, drs, yr_buckets, dictionaries):
     """
     result = assemble_region_data(dataframe, yrs, drs, yr_buckets)
     assert result == dictionaries
+
+
+@pytest.mark.parametrize("disaster_name,region", geo_locator_cases)
+def test_locate_all_regions(disaster_name, region):
+    """
+    Given a string with a short description of a disaster, check that the
+    vectorized region locator labels it the same way the geo locator does.
+
+    Args:
+        disaster_name: A string with a description of the natural disaster.
+        region: A string with the name of a region in the U.S.
+    """
+    result = locate_all_regions(pd.Series([disaster_name]))
+    assert result.name == "Region"
+    assert result.tolist() == [region]
+
+
+def test_locate_all_regions_region_table():
+    """
+    Check that names already in the region table are not classified again,
+    and that newly classified names are added to it.
+    """
+    region_table = {"Houston": "Western"}
+    result = locate_all_regions(pd.Series(["Houston", "Bob"]), region_table)
+    assert result.tolist() == ["Western", "Northeastern"]
+    assert region_table == {"Houston": "Western", "Bob": "Northeastern"}
+
+
+def test_locate_all_regions_matches_geo_locator():
+    """
+    Check that the vectorized region locator agrees with the geo locator on
+    every name in the bundled dataset, repeated names included.
+    """
+    names = read_csv_to_var(DATASET_PATH)["Name"]
+    names = pd.concat([names, names])
+    result = locate_all_regions(names)
+    assert result.tolist() == names.map(geo_locator).tolist()
+
+
+@pytest.mark.parametrize(
+    "num_list,bucket_size,regrouped_list", sum_years_in_buckets_cases
+)
+def test_bucket_years(num_list, bucket_size, regrouped_list):
+    """
+    Given a list of ints and a bucket size, check that the array version of
+    the bucketing matches the sum years in buckets function.
+
+    Args:
+        num_list: A list of ints which are a continuous set of years.
+        bucket_size: An int with the bucket size.
+        regrouped_list: A list of integers of a certain length.
+    """
+    result = bucket_years(np.array(num_list, dtype=float), bucket_size)
+    assert result.tolist() == regrouped_list
+
+
+@pytest.mark.parametrize("num_list,starts,regrouped_list", sum_in_buckets_cases)
+def test_sum_in_buckets(num_list, starts, regrouped_list):
+    """
+    Given a list of ints and the positions where buckets start, check that
+    the function sums each bucket, including empty and leftover ones.
+
+    Args:
+        num_list: A list of ints which are a continuous set of years.
+        starts: A list of ints with the position each bucket starts at.
+        regrouped_list: A list of integers with one sum per bucket.
+    """
+    result = sum_in_buckets(np.array(num_list, dtype=float), starts)
+    assert result.tolist() == regrouped_list
+
+
+@pytest.mark.parametrize("yrs,buckets,starts,labels", year_buckets_cases)
+def test_year_buckets(yrs, buckets, starts, labels):
+    """
+    Given a list of years and either a bucket size or the first year of each
+    bucket, check that the function finds where each bucket starts and labels
+    it.
+
+    Args:
+        yrs: A list of years in increasing order.
+        buckets: An int with the bucket size, or a list of first years.
+        starts: A list of ints with the position each bucket starts at.
+        labels: A list of strings with the label of each bucket.
+    """
+    assert year_buckets(yrs, buckets) == (starts, labels)
+
+
+@pytest.mark.parametrize(
+    "num_list,yrs,window,rolling_list,growth_list", time_series_cases
+)
+def test_time_series(num_list, yrs, window, rolling_list, growth_list):
+    """
+    Given sums per year, check the moving sums, running totals, and year over
+    year growth, with missing calendar years counted as zero.
+
+    Args:
+        num_list: A list of ints with one sum per year.
+        yrs: A list of years in increasing order.
+        window: An int with the number of years in the moving sum.
+        rolling_list: A list of the expected moving sums.
+        growth_list: A list of the expected growth of the first years, with
+        None where it is not defined.
+    """
+    spread = np.array([num_list, num_list], dtype=float)
+    assert rolling_sum(spread, yrs, window)[1].tolist() == rolling_list
+    assert cumulative_sum(spread)[0].tolist() == np.cumsum(num_list).tolist()
+    growth = year_over_year(spread, yrs)[1][: len(growth_list)]
+    assert [None if np.isnan(g) else g for g in growth] == growth_list
+
+
+@pytest.mark.parametrize("buckets", [1, 5, 10])
+def test_organize_regions_matches_assemble_region_data(buckets):
+    """
+    Check that the groupby-based organize regions function gives back the
+    same cost and deaths as running assemble region data on every region of
+    the bundled dataset.
+
+    Args:
+        buckets: An int with the bucket size.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    yrs = retrieve_unique_years(dataframe)
+    drs = retrieve_unique_disaster_types(dataframe)
+    region_dict = fill_all_regions(
+        dataframe, ["Western", "Midwestern", "Southern", "Northeastern"]
+    )
+    cost, deaths = organize_regions(region_dict, yrs, drs, buckets)
+    for region_name, region_frame in region_dict.items():
+        expected_cost, expected_deaths = assemble_region_data(
+            region_frame, yrs, drs, buckets
+        )
+        for disaster in drs:
+            assert cost[region_name][disaster] == pytest.approx(
+                expected_cost[disaster]
+            )
+            assert deaths[region_name][disaster] == pytest.approx(
+                expected_deaths[disaster]
+            )
+
+
+@pytest.mark.parametrize("chunk_rows", [7, 50, 1000])
+def test_organize_csv_in_chunks_matches_organize_regions(chunk_rows):
+    """
+    Check that reading the bundled dataset in chunks gives back the same
+    disaster types, cost, and deaths as loading it whole, whatever the size
+    of the chunks.
+
+    Args:
+        chunk_rows: An int with the number of rows in one chunk.
+    """
+    region_list = ["Western", "Midwestern", "Southern", "Northeastern"]
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    yrs = retrieve_unique_years(dataframe)
+    drs = retrieve_unique_disaster_types(dataframe)
+    expected = organize_regions(
+        fill_all_regions(dataframe, region_list), yrs, drs, 5
+    )
+    result = organize_csv_in_chunks(
+        DATASET_PATH, region_list, buckets=5, chunk_rows=chunk_rows
+    )
+    for got, want in zip(result, expected):
+        for region_name in region_list:
+            assert list(got[region_name]) == list(drs)
+            for disaster in drs:
+                assert got[region_name][disaster] == pytest.approx(
+                    want[region_name][disaster]
+                )
+
+
+def test_organize_csv_in_chunks_region_table():
+    """
+    Check that a region table, when one is given, collects the regions of
+    every distinct name in the file and does not change the result.
+    """
+    region_list = ["Western", "Southern"]
+    region_table = {}
+    with_table = organize_csv_in_chunks(
+        DATASET_PATH, region_list, chunk_rows=50, region_table=region_table
+    )
+    names = read_csv_to_var(DATASET_PATH)["Name"]
+    assert len(region_table) == names.nunique()
+    assert with_table == organize_csv_in_chunks(
+        DATASET_PATH, region_list, chunk_rows=50
+    )
+
+
+attribution_cases = [
+    # One region gets the whole disaster, no region gets nothing
+    (["Texas Flooding", "Hail Storm"], None, [(0, 0, 1.0)]),
+    # Two regions share equally by default
+    (
+        ["Central and Southern Drought"],
+        None,
+        [(0, 0, 0.5), (0, 2, 0.5)],
+    ),
+    # Two regions share in proportion to their weights, and a region
+    # matched alone keeps everything even when its weight is zero
+    (
+        ["Central and Southern Drought", "Kansas Hail"],
+        {"Southern": 3, "Midwestern": 1},
+        [(0, 0, 0.75), (0, 2, 0.25), (1, 2, 1.0)],
+    ),
+    (["Western Wildfire"], {"Southern": 1}, [(0, 1, 1.0)]),
+    # Overrides go to the south only, and missing names get nothing
+    (["North/Central Texas Hail Storm (April 2016)", None], None, [(0, 0, 1)]),
+]
+
+
+@pytest.mark.parametrize("names,weights,entries", attribution_cases)
+def test_attribution_weights(names, weights, entries):
+    """
+    Check that disasters are shared between every region they match.
+
+    Args:
+        names: A list of disaster names.
+        weights: A dictionary of region weights, or None.
+        entries: A list of (disaster, region, share) tuples with the nonzero
+        shares.
+    """
+    events, regions, shares = attribution_weights(pd.Series(names), weights)
+    assert list(zip(events, regions)) == [entry[:2] for entry in entries]
+    assert shares == pytest.approx([entry[2] for entry in entries])
+
+
+def test_organize_attributed_keeps_shared_disasters():
+    """
+    Check that attributing the bundled dataset matches organize regions for
+    disasters that match one region, and that the cost of disasters that
+    match several regions is shared out rather than lost.
+    """
+    region_list = ["Western", "Midwestern", "Southern", "Northeastern"]
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    yrs = retrieve_unique_years(dataframe)
+    drs = retrieve_unique_disaster_types(dataframe)
+    column = "Total CPI-Adjusted Cost (Millions of Dollars)"
+
+    located = dataframe[locate_all_regions(dataframe["Name"]) != "empty"]
+    expected = organize_regions(
+        fill_all_regions(located, region_list), yrs, drs, 5
+    )
+    result = organize_attributed(located, region_list, yrs, drs, 5)
+    for got, want in zip(result, expected):
+        for region_name in region_list:
+            for disaster in drs:
+                assert got[region_name][disaster] == pytest.approx(
+                    want[region_name][disaster]
+                )
+
+    cost, _ = organize_attributed(dataframe, region_list, yrs, drs, 5)
+    events, _, _ = attribution_weights(dataframe["Name"])
+    matched_cost = dataframe[column].iloc[np.unique(events)].sum()
+    assert matched_cost > located[column].sum()
+    assert sum(
+        sum(sum(damages) for damages in disasters.values())
+        for disasters in cost.values()
+    ) == pytest.approx(matched_cost)
+
+
+def test_read_csv_to_var():
+    """
+    Check that the bundled dataset is loaded with the title line skipped,
+    every column already given its type, and the year columns added.
+    """
+    result = read_csv_to_var(DATASET_PATH)
+    assert len(result) == 376
+    assert result.dtypes.astype(str).to_dict() == {
+        "Name": "object",
+        "Disaster": "category",
+        "Begin Date": "object",
+        "End Date": "object",
+        "Total CPI-Adjusted Cost (Millions of Dollars)": "float64",
+        "Deaths": "int32",
+        "Begin Year": "int16",
+        "End Year": "int16",
+    }
+    assert result.iloc[0]["Begin Date"] == "19800410"
+    assert result.iloc[0]["Begin Year"] == 1980
+
+
+def test_parse_all_years():
+    """
+    Check that the dates in a dataframe are shortened to years in place, and
+    that doing it twice changes nothing.
+    """
+    dataframe = pd.DataFrame(
+        {"Begin Date": ["19800410", "20231231"], "End Date": [19800417, 2024]}
+    )
+    parse_all_years(dataframe)
+    parse_all_years(dataframe)
+    assert dataframe["Begin Date"].tolist() == ["1980", "2023"]
+    assert dataframe["End Date"].tolist() == ["1980", "2024"]
@@ -0,0 +1,103 @@
+"""
+Test the functions in profile_data.py
+
+Imports:
+pytest to write pytests!
+io to collect what a sink writes.
+json to read it back.
+"""
+
+import io
+import json
+import pytest
+
+import process_data
+from profile_data import profiling, json_lines_sink, count_rows
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+count_rows_cases = [
+    # No arguments hold rows
+    ((1, "a"), None),
+    # A list is not counted
+    (([1, 2, 3],), None),
+]
+
+
+@pytest.mark.parametrize("args,rows", count_rows_cases)
+def test_count_rows_without_frames(args, rows):
+    """
+    Check that arguments without rows are not counted.
+
+    Args:
+        args: a tuple of arguments.
+        rows: the expected number of rows.
+    """
+    assert count_rows(args) == rows
+
+
+def run_pipeline():
+    """
+    Runs the processing steps the notebook runs, through the module.
+
+    Returns: The cost and deaths dictionaries from organize_regions.
+    """
+    dataframe = process_data.read_csv_to_var(DATASET_PATH)
+    process_data.parse_all_years(dataframe)
+    yrs = process_data.retrieve_unique_years(dataframe)
+    drs = process_data.retrieve_unique_disaster_types(dataframe)
+    region_dict = process_data.fill_all_regions(dataframe, REGION_LIST)
+    return process_data.organize_regions(region_dict, yrs, drs, 5)
+
+
+def test_profiling_records_calls_and_restores_functions():
+    """
+    Check that profiling records each call with its rows, does not change
+    the results, and puts the original functions back afterwards.
+    """
+    original = process_data.read_csv_to_var
+    expected = run_pipeline()
+    with profiling(memory=True) as profile:
+        assert process_data.read_csv_to_var is not original
+        result = run_pipeline()
+    assert process_data.read_csv_to_var is original
+    assert result == expected
+
+    table = profile.summary()
+    assert table.loc["process_data.read_csv_to_var", "calls"] == 1
+    assert table.loc["process_data.parse_all_years", "rows"] == 376
+    # fill_all_regions calls partition_regions through the module
+    assert table.loc["process_data.partition_regions", "calls"] == 1
+    fill = table.loc["process_data.fill_all_regions"]
+    assert fill["own_seconds"] < fill["seconds"]
+    assert table["memory_bytes"].notna().all()
+
+
+def test_profiling_sends_records_to_sinks():
+    """
+    Check that every recorded call is handed to the sinks.
+    """
+    file = io.StringIO()
+    with profiling(sinks=[json_lines_sink(file)]) as profile:
+        process_data.parse_year("19800101")
+    lines = [json.loads(line) for line in file.getvalue().splitlines()]
+    assert lines == profile.records
+    assert lines[0]["function"] == "process_data.parse_year"
+    assert lines[0]["memory_bytes"] is None
+
+
+def test_profiling_keeps_cache_controls():
+    """
+    Check that functions cached with lru_cache, like the geo locator, can
+    still have their caches inspected and cleared inside a profiling block.
+    """
+    with profiling() as profile:
+        process_data.geo_locator.cache_clear()
+        process_data.geo_locator("Texas Flooding")
+        process_data.geo_locator("Texas Flooding")
+        assert process_data.geo_locator.cache_info().hits == 1
+    assert [record["function"] for record in profile.records] == [
+        "process_data.geo_locator"
+    ] * 2
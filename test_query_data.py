@@ -0,0 +1,138 @@
+"""
+Test the functions in query_data.py
+
+Imports:
+pytest to write pytests!
+pandas to put the regions of the split dataset back together.
+"""
+
+import pytest
+import pandas as pd
+
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    fill_all_regions,
+)
+from query_data import DisasterQuery
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+query_cases = [
+    # No filters at all
+    (None, None, None, "cost"),
+    # One region, one disaster type, and a range of years
+    (["Southern"], ["Severe Storm"], (2000, 2010), "deaths"),
+    # Several regions and an open-ended range of years
+    (["Western", "Midwestern"], None, (2015, None), "cost"),
+    # Several disaster types and no matches
+    (["Northeastern"], ["Wildfire", "Drought"], None, "deaths"),
+]
+
+
+def expected_total(region_names, disaster_types, year_range, measure):
+    """
+    Answers a query the long way, by splitting the dataset into regions and
+    filtering each one.
+
+    Args:
+        region_names: a list of regions, or None for all.
+        disaster_types: a list of disaster types, or None for all.
+        year_range: a tuple of the first and last year, or None for all.
+        measure: "cost" or "deaths".
+
+    Returns: A float with the sum of the measure.
+    """
+    column = {
+        "cost": "Total CPI-Adjusted Cost (Millions of Dollars)",
+        "deaths": "Deaths",
+    }[measure]
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    if region_names is not None:
+        region_dict = fill_all_regions(dataframe, REGION_LIST)
+        dataframe = pd.concat(
+            [region_dict[region_name] for region_name in region_names]
+        )
+    if disaster_types is not None:
+        dataframe = dataframe[dataframe["Disaster"].isin(disaster_types)]
+    if year_range is not None:
+        first, last = year_range
+        years = dataframe["Begin Year"]
+        dataframe = dataframe[
+            (years >= (first or 0)) & (years <= (last or 9999))
+        ]
+    return float(dataframe[column].sum())
+
+
+def build_query(query, region_names, disaster_types, year_range):
+    """
+    Adds the filters of a test case to a query.
+
+    Args:
+        query: a DisasterQuery with no filters.
+        region_names: a list of regions, or None for all.
+        disaster_types: a list of disaster types, or None for all.
+        year_range: a tuple of the first and last year, or None for all.
+
+    Returns: The filtered DisasterQuery.
+    """
+    if region_names is not None:
+        query = query.regions(*region_names)
+    if disaster_types is not None:
+        query = query.disasters(*disaster_types)
+    if year_range is not None:
+        query = query.years(*year_range)
+    return query
+
+
+@pytest.mark.parametrize(
+    "region_names,disaster_types,year_range,measure", query_cases
+)
+def test_query_matches_split_dataset(
+    tmp_path, region_names, disaster_types, year_range, measure
+):
+    """
+    Check that a query over a dataframe and over the cached file both give
+    the same total as splitting and filtering the dataset by hand.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+        region_names: a list of regions, or None for all.
+        disaster_types: a list of disaster types, or None for all.
+        year_range: a tuple of the first and last year, or None for all.
+        measure: "cost" or "deaths".
+    """
+    expected = expected_total(region_names, disaster_types, year_range, measure)
+    queries = [
+        DisasterQuery(read_csv_to_var(DATASET_PATH)),
+        DisasterQuery.from_csv(DATASET_PATH, tmp_path),
+    ]
+    for query in queries:
+        query = build_query(query, region_names, disaster_types, year_range)
+        assert query.total(measure) == pytest.approx(expected)
+
+
+def test_query_pushes_filters_into_cached_file(tmp_path):
+    """
+    Check that a query over the cached file only asks for the one column it
+    sums, with the filters handed to the file reader, and that adding a
+    filter does not change the query it was added to.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    query = DisasterQuery.from_csv(DATASET_PATH, tmp_path)
+    southern = query.regions("Southern")
+    plan = southern.years(2000, 2010).plan("deaths")
+    assert plan["pushdown"]
+    assert plan["columns"] == ["Deaths"]
+    assert plan["filters"] == [
+        ("Begin Year", ">=", 2000),
+        ("Begin Year", "<=", 2010),
+        ("Region", "in", ["Southern"]),
+    ]
+    assert southern.filters() == [("Region", "in", ["Southern"])]
+    assert query.filters() == []
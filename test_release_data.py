@@ -0,0 +1,116 @@
+"""
+Test the functions in release_data.py
+
+Imports:
+pytest to write pytests!
+shutil to copy the bundled release into a folder of releases.
+"""
+
+import shutil
+import pytest
+
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    fill_all_regions,
+    organize_regions,
+)
+from release_data import (
+    release_sort_key,
+    discover_releases,
+    tally_releases,
+    organize_releases,
+)
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+release_order_cases = [
+    # Versions are compared by number, not alphabetically
+    (["17.17", "17.9", "9.1"], ["9.1", "17.9", "17.17"]),
+    # Non-numeric parts sort after numeric ones
+    (["17.x", "17.2"], ["17.2", "17.x"]),
+]
+
+
+@pytest.mark.parametrize("versions,ordered", release_order_cases)
+def test_release_sort_key(versions, ordered):
+    """
+    Check that release versions sort in release order.
+
+    Args:
+        versions: a list of version strings.
+        ordered: the versions in the expected order.
+    """
+    assert sorted(versions, key=release_sort_key) == ordered
+
+
+def make_releases(root):
+    """
+    Builds a folder of two releases: the bundled one, and a later one in
+    which the deaths of the first event were revised.
+
+    Args:
+        root: a Path representing the folder to build the releases in.
+
+    Returns: The paths of the two csvs, earliest release first.
+    """
+    paths = []
+    for version in ["17.9", "17.17"]:
+        path = root / version / "data" / "0-data" / "events-US-1980-2023.csv"
+        path.parent.mkdir(parents=True)
+        shutil.copy(DATASET_PATH, path)
+        paths.append(path)
+    release = read_csv_to_var(paths[1]).drop(columns=["Begin Year", "End Year"])
+    release.loc[0, "Deaths"] += 100
+    with open(paths[1], "w", encoding="utf-8") as file:
+        file.write("Billion-Dollar Disasters\n")
+        release.to_csv(file, index=False)
+    return paths
+
+
+def test_organize_releases_matches_serial(tmp_path):
+    """
+    Check that processing releases in worker processes gives the same
+    results as processing each one in turn, and that they are listed in
+    release order.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    paths = make_releases(tmp_path)
+    releases = discover_releases(tmp_path)
+    assert releases == {"17.9": paths[0], "17.17": paths[1]}
+
+    yrs = [str(year) for year in range(1980, 2024)]
+    results = organize_releases(releases, REGION_LIST, yrs, None, 5, 2)
+    assert list(results) == ["17.9", "17.17"]
+    for version, path in releases.items():
+        dataframe = read_csv_to_var(path)
+        parse_all_years(dataframe)
+        drs = list(results[version][0]["Western"])
+        expected = organize_regions(
+            fill_all_regions(dataframe, REGION_LIST), yrs, drs, 5
+        )
+        for got, want in zip(results[version], expected):
+            for region_name in REGION_LIST:
+                for disaster in drs:
+                    assert got[region_name][disaster] == pytest.approx(
+                        want[region_name][disaster]
+                    )
+
+
+def test_tally_releases_shows_revisions(tmp_path):
+    """
+    Check that the combined tally is indexed by release, so revised
+    estimates can be compared between releases.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    make_releases(tmp_path)
+    tally = tally_releases(discover_releases(tmp_path), REGION_LIST, 2)
+    assert list(tally.index.names) == ["Release", "Region", "Disaster", "Year"]
+    deaths = tally["Deaths"].groupby(level="Release").sum()
+    assert deaths["17.17"] - deaths["17.9"] == 100
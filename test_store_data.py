@@ -0,0 +1,100 @@
+"""
+Test the functions in store_data.py
+
+Imports:
+pytest to write pytests!
+store_data to pretend the region keywords changed.
+numpy to check that the stored columns are memory-mapped.
+"""
+
+import numpy as np
+import pytest
+
+import store_data
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    retrieve_unique_disaster_types,
+    fill_all_regions,
+    organize_regions,
+)
+from store_data import (
+    write_release,
+    list_releases,
+    open_release,
+    organize_store,
+)
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+
+def test_open_release_maps_stored_columns(tmp_path):
+    """
+    Check that a stored release is opened as memory-mapped arrays of the
+    stored types that decode back to the loaded dataset.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    write_release(dataframe, "17.17", tmp_path)
+    release = open_release("17.17", tmp_path)
+    assert isinstance(release["cost"], np.memmap)
+    assert release["year"].dtype == np.int16
+    assert release["region"].dtype == np.int8
+    assert list(release["names"][release["name"]]) == list(dataframe["Name"])
+    assert [release["disasters"][code] for code in release["disaster"]] == (
+        list(dataframe["Disaster"])
+    )
+
+
+def test_open_release_rejects_other_keywords(tmp_path, monkeypatch):
+    """
+    Check that a release stored with other region keywords is refused
+    instead of being summed with stale region codes.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+        monkeypatch: A pytest helper used to pretend the keywords changed.
+    """
+    write_release(read_csv_to_var(DATASET_PATH), "17.17", tmp_path)
+    monkeypatch.setattr(store_data, "KEYWORD_FINGERPRINT", "edited")
+    with pytest.raises(ValueError):
+        open_release("17.17", tmp_path)
+    with pytest.raises(ValueError):
+        organize_store(REGION_LIST, ["1980"], ["Drought"], 1, None, tmp_path)
+
+
+def test_organize_store_matches_organize_regions(tmp_path):
+    """
+    Check that organizing stored releases gives the same numbers as
+    organizing each loaded release, and that releases are listed in release
+    order.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    revised = dataframe.copy()
+    revised.loc[0, "Deaths"] += 100
+    write_release(revised, "17.17", tmp_path)
+    write_release(dataframe, "17.9", tmp_path)
+    assert list_releases(tmp_path) == ["17.9", "17.17"]
+
+    yrs = [str(year) for year in range(1980, 2024)]
+    drs = list(retrieve_unique_disaster_types(dataframe))
+    results = organize_store(REGION_LIST, yrs, drs, 5, store_dir=tmp_path)
+    for version, frame in [("17.9", dataframe), ("17.17", revised)]:
+        frame = frame.copy()
+        parse_all_years(frame)
+        expected = organize_regions(
+            fill_all_regions(frame, REGION_LIST), yrs, drs, 5
+        )
+        for got, want in zip(results[version], expected):
+            for region_name in REGION_LIST:
+                for disaster in drs:
+                    assert got[region_name][disaster] == pytest.approx(
+                        want[region_name][disaster]
+                    )
@@ -0,0 +1,191 @@
+"""
+Test the functions in update_data.py
+
+Imports:
+pytest to write pytests!
+pandas to edit the bundled dataset into a "new release".
+"""
+
+import pytest
+import pandas as pd
+
+import update_data
+from process_data import (
+    read_csv_to_var,
+    parse_all_years,
+    retrieve_unique_years,
+    retrieve_unique_disaster_types,
+    fill_all_regions,
+    organize_regions,
+)
+from update_data import update_regions
+
+# The dataset bundled with the repository.
+DATASET_PATH = "0209268/17.17/data/0-data/events-US-1980-2023.csv"
+REGION_LIST = ["Western", "Midwestern", "Southern", "Northeastern"]
+
+
+def write_release(dataframe, path):
+    """
+    Writes a dataframe out in the same layout as the NCEI csv.
+
+    Args:
+        dataframe: a dataframe with the columns of the csv.
+        path: the path to write the csv to.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("Billion-Dollar Disasters\n")
+        dataframe.to_csv(file, index=False)
+
+
+def organize_from_scratch(file_name, yrs, drs, buckets):
+    """
+    Runs the whole pipeline on a csv, the way the notebook does.
+
+    Args:
+        file_name: the path of the csv.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group.
+
+    Returns: The cost and deaths dictionaries from organize_regions.
+    """
+    dataframe = read_csv_to_var(file_name)
+    parse_all_years(dataframe)
+    return organize_regions(
+        fill_all_regions(dataframe, REGION_LIST), yrs, drs, buckets
+    )
+
+
+def assert_organized_close(result, expected):
+    """
+    Checks that two cost and deaths results match up to rounding.
+
+    Args:
+        result: the cost and deaths dictionaries to check.
+        expected: the cost and deaths dictionaries they should match.
+    """
+    for got, want in zip(result, expected):
+        assert list(got) == list(want)
+        for region_name, disasters in want.items():
+            assert list(got[region_name]) == list(disasters)
+            for disaster, damages in disasters.items():
+                assert got[region_name][disaster] == pytest.approx(damages)
+
+
+def test_update_regions_patches_new_release(tmp_path, monkeypatch):
+    """
+    Check that processing a release with added, revised, and removed events
+    on top of an earlier one gives the same result as processing it from
+    scratch, and that only the added and revised events are given regions.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+        monkeypatch: A pytest helper used to count the located names.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    yrs = [str(year) for year in range(1980, 2025)]
+    drs = retrieve_unique_disaster_types(dataframe)
+    state_dir = tmp_path / "state"
+
+    first = update_regions(DATASET_PATH, REGION_LIST, yrs, drs, 5, state_dir)
+    assert_organized_close(
+        first, organize_from_scratch(DATASET_PATH, yrs, drs, 5)
+    )
+
+    release = dataframe.drop(columns=["Begin Year", "End Year"])
+    release.loc[0, "Deaths"] = 100
+    release = release.drop(index=5)
+    release.loc[len(release) + 1] = [
+        "Western Wildfire (2024)",
+        "Wildfire",
+        "20240101",
+        "20240102",
+        1000.0,
+        2,
+    ]
+    release_path = tmp_path / "release.csv"
+    write_release(release, release_path)
+
+    located = []
+    locate = update_data.locate_all_regions
+    monkeypatch.setattr(
+        update_data,
+        "locate_all_regions",
+        lambda names: located.extend(names) or locate(names),
+    )
+    second = update_regions(
+        release_path, REGION_LIST, yrs, drs, 5, state_dir, verify=True
+    )
+    assert sorted(located) == sorted(
+        [dataframe["Name"][0], "Western Wildfire (2024)"]
+    )
+    assert_organized_close(
+        second, organize_from_scratch(release_path, yrs, drs, 5)
+    )
+
+
+def test_update_regions_verify_catches_bad_state(tmp_path):
+    """
+    Check that the verification option notices a stored tally that no longer
+    matches the data.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    parse_all_years(dataframe)
+    yrs = retrieve_unique_years(dataframe)
+    drs = retrieve_unique_disaster_types(dataframe)
+    state_dir = tmp_path / "state"
+    update_regions(DATASET_PATH, REGION_LIST, yrs, drs, 5, state_dir)
+
+    [tally_path] = state_dir.glob("tally-*.parquet")
+    tally = pd.read_parquet(tally_path)
+    tally["Cost"] *= 2
+    tally.to_parquet(tally_path)
+    with pytest.raises(ValueError):
+        update_regions(
+            DATASET_PATH, REGION_LIST, yrs, drs, 5, state_dir, verify=True
+        )
+
+
+def test_update_regions_recovers_from_interrupted_write(tmp_path, monkeypatch):
+    """
+    Check that a run that stops after writing the new tally but before
+    writing the new snapshot does not leave the next run patching the new
+    tally against the old snapshot.
+
+    Args:
+        tmp_path: A temporary folder provided by pytest.
+        monkeypatch: A pytest helper used to stop the run partway through.
+    """
+    dataframe = read_csv_to_var(DATASET_PATH)
+    yrs = [str(year) for year in range(1980, 2025)]
+    drs = retrieve_unique_disaster_types(dataframe)
+    state_dir = tmp_path / "state"
+    update_regions(DATASET_PATH, REGION_LIST, yrs, drs, 5, state_dir)
+
+    release = dataframe.drop(columns=["Begin Year", "End Year"])
+    release.loc[0, "Deaths"] = 100
+    release_path = tmp_path / "release.csv"
+    write_release(release, release_path)
+
+    write_parquet = update_data.write_parquet
+
+    def write_tally_only(dataframe, path, index):
+        if path.name.startswith("snapshot-"):
+            raise KeyboardInterrupt
+        write_parquet(dataframe, path, index)
+
+    monkeypatch.setattr(update_data, "write_parquet", write_tally_only)
+    with pytest.raises(KeyboardInterrupt):
+        update_regions(release_path, REGION_LIST, yrs, drs, 5, state_dir)
+    monkeypatch.setattr(update_data, "write_parquet", write_parquet)
+
+    for _ in range(2):
+        assert_organized_close(
+            update_regions(release_path, REGION_LIST, yrs, drs, 5, state_dir),
+            organize_from_scratch(release_path, yrs, drs, 5),
+        )
+    assert len(list(state_dir.glob("tally-*.parquet"))) == 1
@@ -0,0 +1,216 @@
+"""
+This file contains code for bringing the processed data up to date with a new
+NCEI release without processing the whole history again.
+
+Each release of the dataset is mostly the previous release plus a few new
+events, so the last processed release (the "snapshot") and its sums per
+region, disaster type, and year (the "tally") are kept on disk. A new release
+is compared with the snapshot row by row; only the rows that were added or
+changed are given regions and summed, and those sums are used to patch the
+stored tally. The name of the tally contains a fingerprint of the snapshot it
+was made from, so a tally is never patched against the wrong snapshot, even
+if a run stopped partway through writing them.
+
+This file uses five imports to help update the data: hashlib, os, numpy,
+pathlib, and pandas.
+pandas is used to compare the releases and to store the snapshot and tally in
+the Parquet format.
+numpy is used to check an updated result against a full recompute.
+hashlib is used to fingerprint the snapshot.
+os and pathlib are used to find, replace, and clean up the stored files.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from lazy_import import lazy_import
+from cache_data import CACHE_DIR
+from process_data import (
+    CSV_DTYPES,
+    KEYWORD_FINGERPRINT,
+    REGION_CATEGORIES,
+    read_csv_to_var,
+    parse_all_years,
+    locate_all_regions,
+    partition_regions,
+    tally_events,
+    organize_tally,
+    organize_regions,
+)
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# the folder the snapshot and tally are kept in unless another one is given
+STATE_DIR = Path(CACHE_DIR) / "incremental"
+
+
+def row_keys(dataframe):
+    """
+    Gives every row of a dataframe of disasters a key built from all of its
+    values, so that the same event gets the same key in any release and an
+    event whose values were revised gets a new one. Rows that are exact
+    copies of each other are numbered so that they still get distinct keys.
+
+    Args:
+        dataframe: a dataframe with the columns of the csv.
+
+    Returns: A pandas MultiIndex with one (hash, copy number) key per row.
+    """
+    hashes = pd.util.hash_pandas_object(
+        dataframe[list(CSV_DTYPES)], index=False
+    )
+    copy_numbers = hashes.groupby(hashes).cumcount()
+    return pd.MultiIndex.from_arrays([hashes, copy_numbers])
+
+
+def snapshot_fingerprint(dataframe):
+    """
+    Fingerprints the rows of a release, so that a tally can name the
+    snapshot it was made from.
+
+    Args:
+        dataframe: a dataframe with the columns of the csv.
+
+    Returns: A string of 16 hexadecimal digits.
+    """
+    hashes = row_keys(dataframe).get_level_values(0).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def state_paths(fingerprint, state_dir=STATE_DIR):
+    """
+    Works out where the snapshot and tally are stored. Their names contain
+    the fingerprint of the region keywords, since the stored regions are only
+    valid for the keywords they were found with, and the name of the tally
+    also contains the fingerprint of the snapshot it goes with.
+
+    Args:
+        fingerprint: a string made by snapshot_fingerprint from the snapshot.
+        state_dir: a string or Path representing the folder the snapshot and
+        tally are stored in.
+
+    Returns: A Path to the snapshot and a Path to the tally, in that order.
+    """
+    return (
+        Path(state_dir) / f"snapshot-{KEYWORD_FINGERPRINT}.parquet",
+        Path(state_dir) / f"tally-{KEYWORD_FINGERPRINT}-{fingerprint}.parquet",
+    )
+
+
+def write_parquet(dataframe, path, index):
+    """
+    Writes a dataframe to a Parquet file by way of a temporary file, so that
+    an interrupted write never leaves a half-written file under the real
+    name.
+
+    Args:
+        dataframe: the dataframe to write.
+        path: a Path to write it to.
+        index: a boolean; True to store the index of the dataframe too.
+    """
+    temp_path = path.with_suffix(".tmp")
+    dataframe.to_parquet(temp_path, index=index)
+    os.replace(temp_path, path)
+
+
+def update_regions(
+    file_name, region_list, yrs, drs, buckets, state_dir=STATE_DIR, verify=False
+):
+    """
+    Given the csv of a new release, return the same cost and deaths
+    dictionaries as running read_csv_to_var, parse_all_years,
+    fill_all_regions, and organize_regions on it. If a snapshot of an earlier
+    release is stored in state_dir along with its tally, only the rows that
+    differ from it are given regions and summed; otherwise everything is
+    processed. Either way,
+    the new release becomes the stored snapshot.
+
+    Args:
+        file_name: a string representing the path of the new csv.
+        region_list: a list of strings representing the names of US regions.
+        yrs: a list containing all possible years.
+        drs: a list containing all possible disasters.
+        buckets: an int representing the number of years in one group.
+        state_dir: a string or Path representing the folder the snapshot and
+        tally are stored in.
+        verify: a boolean. If True, the result is also computed from scratch
+        and the two are compared.
+
+    Returns: A list containing two dictionaries; one for cost and deaths
+    respectively, shaped like the ones returned by organize regions.
+
+    Raises:
+        ValueError: if verify is True and the updated result does not match
+        the one computed from scratch.
+    """
+    new_frame = read_csv_to_var(file_name)
+    parse_all_years(new_frame)
+    fingerprint = snapshot_fingerprint(new_frame)
+    snapshot_path, tally_path = state_paths(fingerprint, state_dir)
+
+    old_frame = (
+        pd.read_parquet(snapshot_path) if snapshot_path.exists() else None
+    )
+    old_tally_path = (
+        state_paths(snapshot_fingerprint(old_frame), state_dir)[1]
+        if old_frame is not None
+        else None
+    )
+    if old_tally_path is not None and old_tally_path.exists():
+        old_keys = row_keys(old_frame)
+        new_keys = row_keys(new_frame)
+        removed = ~old_keys.isin(new_keys)
+        added = ~new_keys.isin(old_keys)
+
+        # rows the two releases share keep the region found for them before
+        regions = (
+            pd.Series(old_frame["Region"].to_numpy(), index=old_keys)
+            .reindex(new_keys)
+            .to_numpy()
+        )
+        regions[added] = locate_all_regions(new_frame["Name"][added])
+        new_frame["Region"] = pd.Categorical(
+            regions, categories=REGION_CATEGORIES
+        )
+        tally = (
+            pd.read_parquet(old_tally_path)
+            .add(tally_events(new_frame[added]), fill_value=0)
+            .sub(tally_events(old_frame[removed]), fill_value=0)
+        )
+    else:
+        new_frame["Region"] = locate_all_regions(new_frame["Name"])
+        tally = tally_events(new_frame)
+
+    result = organize_tally(tally, region_list, yrs, drs, buckets)
+    if verify:
+        expected = organize_regions(
+            partition_regions(new_frame.drop(columns="Region"), region_list),
+            yrs,
+            drs,
+            buckets,
+        )
+        for got, want in zip(result, expected):
+            for region_name in region_list:
+                for disaster in drs:
+                    if not np.allclose(
+                        got[region_name][disaster], want[region_name][disaster]
+                    ):
+                        raise ValueError(
+                            f"Updated {region_name} {disaster} sums do not"
+                            " match a full recompute"
+                        )
+
+    # the tally is written first: until the snapshot is replaced as well, the
+    # next run still finds the tally named after the old snapshot
+    Path(state_dir).mkdir(parents=True, exist_ok=True)
+    write_parquet(tally, tally_path, index=True)
+    write_parquet(new_frame, snapshot_path, index=False)
+    for stale_path in Path(state_dir).glob(
+        f"tally-{KEYWORD_FINGERPRINT}-*.parquet"
+    ):
+        if stale_path != tally_path:
+            stale_path.unlink()
+    return result